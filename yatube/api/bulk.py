@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.db import transaction
+from posts import bulk
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Список объектов, сохраняемый одним bulk_create или bulk_update."""
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return bulk.bulk_create(
+            model, [model(**attrs) for attrs in validated_data])
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for field, value in attrs.items():
+                setattr(instance, field, value)
+            fields.update(attrs)
+        if not fields:
+            return instances
+        return bulk.bulk_update(self.child.Meta.model, instances, fields)
+
+
+class BulkMixin:
+    """
+    Пакетные операции на .../bulk/: POST со списком новых объектов,
+    PATCH со списком изменений (у каждого — id) и DELETE со списком id.
+    Пакет проверяется и записывается целиком в одной транзакции; при
+    ошибках возвращается список ошибок по позициям пакета. Права
+    на правку и удаление проверяются для каждого объекта.
+    """
+    bulk_errors = {
+        'not_list': 'Ожидается список.',
+        'too_many': 'Не больше {limit} объектов за запрос.',
+        'no_id': 'Укажите id объекта.',
+        'not_found': 'Объект не найден.',
+    }
+
+    @action(detail=False, methods=['post', 'patch', 'delete'],
+            url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return self.bulk_error(self.bulk_errors['not_list'])
+        if len(items) > settings.API_BULK_MAX_SIZE:
+            return self.bulk_error(self.bulk_errors['too_many'].format(
+                limit=settings.API_BULK_MAX_SIZE))
+        handler = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_update,
+            'DELETE': self.bulk_destroy,
+        }[request.method]
+        with transaction.atomic():
+            return handler(request, items)
+
+    def bulk_error(self, message, code=status.HTTP_400_BAD_REQUEST):
+        return Response({'non_field_errors': [message]}, status=code)
+
+    def bulk_create(self, request, items):
+        serializer = self.get_serializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def get_bulk_objects(self, request, ids):
+        """
+        Объекты пакета по позициям и ошибки по позициям: нет id, объект
+        не найден или нет прав на его изменение.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        found = queryset.select_for_update().in_bulk(
+            [pk for pk in ids if isinstance(pk, int)])
+        objects, errors = [], []
+        status_code = status.HTTP_400_BAD_REQUEST
+        for pk in ids:
+            obj = found.get(pk) if isinstance(pk, int) else None
+            error = {}
+            if not isinstance(pk, int):
+                error = {'id': [self.bulk_errors['no_id']]}
+            elif obj is None:
+                error = {'id': [self.bulk_errors['not_found']]}
+            else:
+                try:
+                    self.check_object_permissions(request, obj)
+                except PermissionDenied as exc:
+                    error = {'detail': exc.detail}
+                    status_code = status.HTTP_403_FORBIDDEN
+            objects.append(obj)
+            errors.append(error)
+        if any(errors):
+            return None, Response(errors, status=status_code)
+        return objects, None
+
+    def bulk_update(self, request, items):
+        ids = [item.get('id') if isinstance(item, dict) else None
+               for item in items]
+        objects, response = self.get_bulk_objects(request, ids)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(objects, data=items, many=True,
+                                         partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors,
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data)
+
+    def bulk_destroy(self, request, items):
+        objects, response = self.get_bulk_objects(request, items)
+        if response is not None:
+            return response
+        self.filter_queryset(self.get_queryset()).filter(
+            pk__in=[obj.pk for obj in objects]).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
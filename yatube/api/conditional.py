@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from posts.deletions import deletion_version
+from rest_framework.response import Response
+
+
+def _microseconds(value):
+    return int(value.timestamp() * 10 ** 6) if value else 0
+
+
+def get_collection_version(queryset, modified_field='updated'):
+    """
+    Версия всей коллекции: новая запись и правка сдвигают наибольшую
+    отметку изменения, удаление меняет версию удалений.
+    """
+    version = queryset.order_by().aggregate(
+        modified=Max(modified_field),
+        deletions=Max(deletion_version(queryset.model)))
+    return (f'{_microseconds(version["modified"])}-'
+            f'{version["deletions"] or 0}')
+
+
+class ConditionalMixin:
+    """
+    Условные запросы к вьюсету. Валидаторы считаются по id и отметкам
+    изменения без сериализации: у списка — по наибольшей отметке
+    изменения и версии удалений, у объекта — по id и отметке. If-None-Match
+    и If-Modified-Since отвечают 304 до сериализатора, If-Match
+    и If-Unmodified-Since защищают PUT/PATCH от перезаписи чужой правки.
+    Last-Modified у списка не отдаётся: удаление записи его не меняет.
+    """
+    modified_field = 'updated'
+
+    def get_list_validators(self, queryset):
+        """
+        Валидаторы списка по всей коллекции до фильтров.
+        None — список без валидаторов.
+        """
+        etag = get_collection_version(queryset, self.modified_field)
+        return quote_etag(etag), None
+
+    def get_object_validators(self, instance):
+        modified = getattr(instance, self.modified_field)
+        etag = f'{instance.pk}-{_microseconds(modified)}'
+        return quote_etag(etag), modified
+
+    def check_conditions(self, request, etag, modified):
+        """
+        Ответ 304 или 412, если условия запроса это требуют. У 304,
+        как у полного ответа, есть валидаторы.
+        """
+        response = get_conditional_response(
+            request, etag=etag,
+            last_modified=int(modified.timestamp()) if modified else None)
+        if response is not None and response.status_code == 304:
+            self.set_validators(response, etag, modified)
+        return response
+
+    def set_validators(self, response, etag, modified):
+        response['ETag'] = etag
+        if modified is not None:
+            response['Last-Modified'] = http_date(modified.timestamp())
+        return response
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in ('PUT', 'PATCH'):
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        base_queryset = self.get_queryset()
+        validators = self.get_list_validators(base_queryset)
+        if validators is not None:
+            response = self.check_conditions(request, *validators)
+            if response is not None:
+                return response
+        response = self.get_list_response(self.filter_queryset(base_queryset))
+        if validators is None:
+            return response
+        return self.set_validators(response, *validators)
+
+    def get_list_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_object_validators(instance)
+        response = self.check_conditions(request, *validators)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return self.set_validators(Response(serializer.data), *validators)
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        response = self.check_conditions(
+            request, *self.get_object_validators(instance))
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance, data=request.data,
+                                         partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return self.set_validators(Response(serializer.data),
+                                   *self.get_object_validators(instance))
@@ -0,0 +1,33 @@
+from posts.search import filter_search
+from posts.usernames import filter_username_prefix
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск постов по ?search=. Если порядок не задан
+    явно через ?ordering=, результаты сортируются по релевантности.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        searched = filter_search(queryset, query)
+        if searched is queryset:
+            return queryset
+        if OrderingFilter.ordering_param in request.query_params:
+            return searched
+        return searched.order_by('search_rank', 'id')
+
+
+class UsernamePrefixFilter(BaseFilterBackend):
+    """
+    Поиск по началу имени пользователя без учёта регистра (?search=).
+    Поле ключа задаётся атрибутом username_key_field вьюсета.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        prefix = request.query_params.get(self.search_param, '').strip()
+        return filter_username_prefix(queryset, prefix,
+                                      view.username_key_field)
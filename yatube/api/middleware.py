@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+GZIP_ETAG_SUFFIX: str = '-gzip'
+CONDITIONAL_HEADERS: tuple = ('HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH')
+
+
+def accepts_gzip(accept_encoding):
+    """Разрешает ли Accept-Encoding gzip с учётом q=0 и '*'."""
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights.get('gzip', weights.get('*', 0.0)) > 0
+
+
+class ApiGZipMiddleware(MiddlewareMixin):
+    """
+    Сжатие ответов API gzip, если клиент принимает его в Accept-Encoding,
+    а тело не меньше settings.API_GZIP_MIN_SIZE. В отличие от
+    GZipMiddleware ETag остаётся сильным: к сжатому представлению
+    добавляется суффикс -gzip, а из If-Match и If-None-Match запроса он
+    снимается, так что проверки условных запросов во вьюсетах видят
+    исходный ETag и защита правок через If-Match продолжает работать.
+    """
+
+    def is_api(self, request):
+        return request.path.startswith(settings.API_GZIP_PATH)
+
+    def process_request(self, request):
+        if not self.is_api(request):
+            return
+        for header in CONDITIONAL_HEADERS:
+            value = request.META.get(header)
+            if value and f'{GZIP_ETAG_SUFFIX}"' in value:
+                request.META[header] = value.replace(
+                    f'{GZIP_ETAG_SUFFIX}"', '"')
+                request.gzip_etag = True
+
+    def process_response(self, request, response):
+        if (not self.is_api(request) or response.streaming
+                or response.has_header('Content-Encoding')):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return response
+        if response.status_code == 304:
+            if getattr(request, 'gzip_etag', False):
+                self.mark_etag(response)
+            return response
+        if len(response.content) < settings.API_GZIP_MIN_SIZE:
+            return response
+        compressed = compress_string(response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = 'gzip'
+        self.mark_etag(response)
+        return response
+
+    def mark_etag(self, response):
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = f'{etag[:-1]}{GZIP_ETAG_SUFFIX}"'
@@ -0,0 +1,66 @@
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       LimitOffsetPagination)
+
+OFFSET_MODE: str = 'offset'
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация без COUNT-запроса. Порядок берётся из queryset
+    после фильтров (?ordering=, поиск, лента тега), при одном поле
+    дополняется id, чтобы страницы не теряли и не повторяли записи.
+    С ?pagination=offset или ?offset= работает прежняя пагинация
+    limit/offset.
+    """
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-id',)
+    mode_query_param = 'pagination'
+    offset_pagination_class = LimitOffsetPagination
+
+    def __init__(self):
+        self.offset_paginator = None
+
+    def use_offset(self, request):
+        return (request.query_params.get(self.mode_query_param) == OFFSET_MODE
+                or self.offset_pagination_class.offset_query_param
+                in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_offset(request):
+            self.offset_paginator = self.offset_pagination_class()
+            self.offset_paginator.default_limit = self.page_size
+            self.offset_paginator.max_limit = self.max_page_size
+            return self.offset_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(queryset.query.order_by) or self.ordering
+        if len(ordering) == 1 and ordering[0].lstrip('-') not in ('id', 'pk'):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def get_embedded_previous_link(self, url, ordering, page, previous):
+        """
+        Ссылка на предыдущую страницу списка url, последние объекты
+        которого page встроены в другой ответ, а previous идёт перед
+        ними. Состояние то же, что у последней страницы (?cursor= с r=1
+        без позиции), поэтому курсор учитывает равные позиции.
+        """
+        self.base_url = url
+        self.ordering = tuple(ordering)
+        self.page = page
+        self.page_size = len(page)
+        self.cursor = Cursor(offset=0, reverse=True, position=None)
+        self.has_next = False
+        self.has_previous = True
+        self.previous_position = self._get_position_from_instance(
+            previous, self.ordering)
+        return self.get_previous_link()
@@ -0,0 +1,43 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS: tuple = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же компактным UTF-8 выводом, что
+    у рендерера DRF: даты, Decimal, ленивые строки и прочие типы
+    отдаются кодировщику DRF. Без orjson, с отступами (browsable API,
+    ?indent) или с настройками DRF, которые orjson не повторяет,
+    используется стандартный json. Объекты, которые orjson не умеет
+    записать (целые больше 64 бит, нестроковые ключи), тоже уходят
+    в стандартный json.
+    """
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (orjson is not None and self.compact
+                and not self.ensure_ascii and self.get_indent(
+                    accepted_media_type, renderer_context or {}) is None)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.use_orjson(accepted_media_type,
+                                               renderer_context):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        for separator, escaped in LINE_SEPARATORS:
+            ret = ret.replace(separator, escaped)
+        return ret
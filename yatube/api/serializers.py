@@ -1,40 +1,87 @@
-from posts.models import Comment, Follow, Group, Post, User
+from posts.models import (Comment, Follow, Group, Post, User,
+                          parse_image_variants)
+from posts.thumbnails import get_variant_urls
+from posts.uploads import get_too_large_message, process_post_image
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 
+from .bulk import BulkListSerializer
+from .sparse import SparseFieldsSerializerMixin
+from .values import get_file_url
+
 
 class GroupSerializer(serializers.ModelSerializer):
     """Описание сериализатора для модели Group"""
 
     class Meta:
         model = Group
-        fields = '__all__'
+        fields = ('id', 'title', 'slug', 'description')
+
+
+class PostImageField(serializers.ImageField):
+    """Поле картинки поста с теми же проверками, что и в форме."""
 
+    def to_internal_value(self, data):
+        if getattr(data, 'oversized', False):
+            raise serializers.ValidationError(get_too_large_message())
+        return process_post_image(super().to_internal_value(data))
 
-class PostSerializer(serializers.ModelSerializer):
+
+class PostSerializer(SparseFieldsSerializerMixin,
+                     serializers.ModelSerializer):
     """Описание сериализатора для модели Post"""
     author = SlugRelatedField(read_only=True, slug_field='username')
+    image = PostImageField(label='Картинка', max_length=100, required=False)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
-        fields = ('id', 'text', 'pub_date', 'author', 'image', 'group')
+        fields = ('id', 'text', 'pub_date', 'author', 'image', 'group',
+                  'image_width', 'image_height', 'image_color',
+                  'image_variants')
         model = Post
+        list_serializer_class = BulkListSerializer
+        sparse_sources = {'image_variants': ('image_variants', 'thumbnail')}
+
+    def get_include_fields(self):
+        return {
+            'comments': CommentSerializer(many=True, read_only=True),
+            'group': GroupSerializer(read_only=True),
+        }
+
+    def get_image_variants(self, obj):
+        request = self.context.get('request')
+        variants = get_variant_urls(obj)
+        for variant in variants:
+            del variant['name']
+            if request is not None:
+                variant['url'] = request.build_absolute_uri(variant['url'])
+        return variants
 
+    def get_image_variants_from_row(self, row):
+        url = get_file_url(self, Post._meta.get_field('thumbnail').storage)
+        variants = parse_image_variants(row['image_variants'])
+        for variant in variants:
+            variant['url'] = url(variant.pop('name'))
+        return variants
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     """Описание сериализатора для модели Comment"""
     author = SlugRelatedField(read_only=True, slug_field='username')
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'post', 'author', 'text', 'created')
         model = Comment
         read_only_fields = ('post',)
+        list_serializer_class = BulkListSerializer
 
 
 class FollowSerializer(serializers.ModelSerializer):
     """Описание сериализатора для модели Follow"""
     user = SlugRelatedField(read_only=True, slug_field='username',
                             default=serializers.CurrentUserDefault())
-    following = SlugRelatedField(slug_field='username',
+    following = SlugRelatedField(source='author', slug_field='username',
                                  queryset=User.objects.all())
 
     class Meta:
@@ -53,3 +100,13 @@ class FollowSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Пользователь не может подписаться на самого себя!')
         return value
+
+
+class UserAutocompleteSerializer(serializers.ModelSerializer):
+    """Описание сериализатора для подсказок имени пользователя"""
+    followers_count = serializers.IntegerField(
+        source='counters.followers_count', read_only=True)
+
+    class Meta:
+        fields = ('username', 'first_name', 'last_name', 'followers_count')
+        model = User
@@ -0,0 +1,253 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.utils.http import quote_etag
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+
+from .conditional import get_collection_version
+from .pagination import KeysetPagination
+
+
+def _split(value):
+    return [name for name in (part.strip() for part in value.split(','))
+            if name]
+
+
+def filter_latest(queryset, field, parent_ids, size):
+    """
+    Не больше size последних по порядку queryset объектов для каждого
+    значения field из parent_ids. Id выбираются одним запросом, каждая
+    часть UNION ALL которого читает только начало индекса по field
+    и порядку, а не все связанные строки, как prefetch_related.
+    """
+    ordering = [name[1:] if name.startswith('-') else f'-{name}'
+                for name in queryset.query.order_by]
+    parts, params = [], []
+    for parent_id in parent_ids:
+        sql, part_params = (
+            queryset.filter(**{field: parent_id}).order_by(*ordering)
+            .values_list('pk')[:size].query.sql_with_params())
+        parts.append(f'SELECT * FROM ({sql})')
+        params.extend(part_params)
+    if not parts:
+        return queryset.none()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(parts), params)
+        ids = [pk for pk, in cursor.fetchall()]
+    return queryset.filter(pk__in=ids)
+
+
+class IncludeNextField(serializers.ReadOnlyField):
+    """Ссылка на объекты связи, не поместившиеся во встроенный список."""
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', **kwargs)
+
+    def to_representation(self, value):
+        return getattr(value, self.field_name, None)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Сериализатор с выбором полей: fields оставляет только перечисленные
+    поля, include добавляет связанные объекты из get_include_fields(),
+    к спискам — ссылку <имя>_next на остальные. Meta.sparse_sources
+    задаёт столбцы модели для вычисляемых полей.
+    """
+
+    def __init__(self, *args, fields=None, include=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        include_fields = self.get_include_fields()
+        for name in include:
+            self.fields[name] = include_fields[name]
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(include):
+                self.fields.pop(name)
+        for name in include:
+            if isinstance(self.fields[name], serializers.ListSerializer):
+                self.fields[f'{name}_next'] = IncludeNextField()
+
+    def get_include_fields(self):
+        """Встраиваемые связанные объекты по именам для ?include=."""
+        return {}
+
+    def get_sparse_sources(self):
+        """Столбцы модели, которые читают оставшиеся поля."""
+        sources = getattr(self.Meta, 'sparse_sources', {})
+        columns = set()
+        for name, field in self.fields.items():
+            if name in sources:
+                columns.update(sources[name])
+            elif isinstance(field, serializers.ListSerializer):
+                continue
+            elif isinstance(field, serializers.SlugRelatedField):
+                columns.add(f'{field.source}__{field.slug_field}')
+            elif field.source != '*':
+                columns.add(field.source.replace('.', '__'))
+        return columns
+
+
+class SparseFieldsMixin:
+    """
+    Выбор полей ответа на GET: ?fields=id,text оставляет перечисленные
+    поля и выбирает из базы только нужные для них столбцы, ?include=
+    встраивает связанные объекты: прямые связи — через select_related,
+    из обратных — не больше API_INCLUDE_SIZE последних объектов одним
+    запросом на страницу и ссылку <имя>_next на предыдущую страницу
+    их списка (include_urls: имя маршрута и его аргумент). Валидаторы
+    условных запросов учитывают выбранные поля и версии встроенных
+    коллекций.
+    """
+    fields_param = 'fields'
+    include_param = 'include'
+    include_related = {}
+    include_urls = {}
+    sparse_errors = {
+        'unknown': 'Неизвестные поля: {names}.',
+        'empty': 'Укажите хотя бы одно поле.',
+    }
+
+    def get_sparse_params(self):
+        """Запрошенные поля (None — все) и встраиваемые объекты."""
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None, ()
+        if hasattr(self, '_sparse_params'):
+            return self._sparse_params
+        params = self.request.query_params
+        fields = include = ()
+        if self.fields_param in params:
+            fields = _split(params[self.fields_param])
+            if not fields:
+                raise ValidationError(
+                    {self.fields_param: [self.sparse_errors['empty']]})
+        if self.include_param in params:
+            include = _split(params[self.include_param])
+        serializer = self.get_serializer_class()(context={})
+        self.check_sparse_names(self.fields_param, fields, serializer.fields)
+        self.check_sparse_names(self.include_param, include,
+                                serializer.get_include_fields())
+        self._sparse_params = (
+            fields if self.fields_param in params else None,
+            tuple(dict.fromkeys(include)))
+        return self._sparse_params
+
+    def check_sparse_names(self, param, names, known):
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValidationError({param: [self.sparse_errors[
+                'unknown'].format(names=', '.join(unknown))]})
+
+    def get_serializer(self, *args, **kwargs):
+        fields, include = self.get_sparse_params()
+        if fields is not None:
+            kwargs['fields'] = fields
+        if include:
+            kwargs['include'] = include
+            if args:
+                args = (self.embed_related(args[0], include,
+                                           kwargs.get('many', False)),
+                        *args[1:])
+        return super().get_serializer(*args, **kwargs)
+
+    def embed_related(self, instance, include, many):
+        """Загружает встраиваемые обратные связи объекта или страницы."""
+        instances = list(instance) if many else [instance]
+        for name in include:
+            if name in self.include_related:
+                self.embed_latest(instances, name)
+        return instances if many else instance
+
+    def embed_latest(self, instances, name):
+        """
+        Кладёт в кэш связи name каждого объекта, как prefetch_related,
+        последние объекты в порядке списка связи, а в <name>_next —
+        ссылку на предыдущую страницу этого списка или None.
+        """
+        size = settings.API_INCLUDE_SIZE
+        related = self.include_related[name]
+        model = self.get_serializer_class().Meta.model
+        field = model._meta.get_field(name).field
+        embedded = defaultdict(list)
+        for obj in filter_latest(related, field.name,
+                                 [instance.pk for instance in instances],
+                                 size + 1):
+            embedded[getattr(obj, field.attname)].append(obj)
+        url_name, url_kwarg = self.include_urls[name]
+        for instance in instances:
+            objects = embedded[instance.pk]
+            previous = objects.pop(0) if len(objects) > size else None
+            cached = getattr(instance, name).all()
+            cached._result_cache = objects
+            cached._prefetch_done = True
+            instance.__dict__.setdefault(
+                '_prefetched_objects_cache', {})[name] = cached
+            link = None
+            if previous is not None:
+                link = KeysetPagination().get_embedded_previous_link(
+                    reverse(url_name, kwargs={url_kwarg: instance.pk},
+                            request=self.request),
+                    related.query.order_by, objects, previous)
+            setattr(instance, f'{name}_next', link)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, include = self.get_sparse_params()
+        model = queryset.model
+        for name in include:
+            if model._meta.get_field(name).many_to_one:
+                queryset = queryset.select_related(name)
+        if fields is None:
+            return queryset
+        return queryset.only(*self.get_sparse_columns(queryset))
+
+    def get_sparse_columns(self, queryset):
+        """
+        Столбцы для .only(): поля ответа, первичный ключ, отметка
+        изменения, поля сортировки и связи из select_related.
+        """
+        opts = queryset.model._meta
+        concrete = {field.name for field in opts.concrete_fields}
+        columns = self.get_serializer().get_sparse_sources()
+        columns.add(opts.pk.name)
+        modified_field = getattr(self, 'modified_field', None)
+        if modified_field in concrete:
+            columns.add(modified_field)
+        columns.update(name for name in (
+            field.lstrip('-') for field in queryset.query.order_by)
+            if name in concrete)
+        related = queryset.query.select_related
+        if isinstance(related, dict):
+            columns.update(
+                name for name in related
+                if not any(column.startswith(f'{name}__')
+                           for column in columns))
+        return sorted(columns)
+
+    def get_list_validators(self, queryset):
+        return self.vary_validators(super().get_list_validators(queryset))
+
+    def get_object_validators(self, instance):
+        return self.vary_validators(super().get_object_validators(instance))
+
+    def vary_validators(self, validators):
+        """
+        ETag с выбранными полями и версиями встроенных коллекций.
+        Last-Modified при встраивании не отдаётся: правка связанных
+        объектов его не меняет.
+        """
+        fields, include = self.get_sparse_params()
+        if validators is None or (fields is None and not include):
+            return validators
+        etag, modified = validators
+        parts = [etag.strip('"')]
+        if fields is not None:
+            parts.append(','.join(sorted(fields)))
+        for name in include:
+            model = self.get_serializer_class().Meta.model
+            related = model._meta.get_field(name).related_model
+            version = get_collection_version(related._default_manager.all())
+            parts.append(f'{name}:{version}')
+        return quote_etag(';'.join(parts)), None if include else modified
@@ -1,4 +1,5 @@
-from api.views import CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet
+from api.views import (CommentViewSet, FollowViewSet, GroupViewSet,
+                       PostViewSet, TagPostViewSet, UserAutocompleteViewSet)
 from django.urls import include, path
 from rest_framework.authtoken import views
 from rest_framework.routers import DefaultRouter
@@ -7,8 +8,12 @@ router = DefaultRouter()
 router.register('posts', PostViewSet)
 router.register('groups', GroupViewSet)
 router.register('follow', FollowViewSet, basename='following')
+router.register('users/autocomplete', UserAutocompleteViewSet,
+                basename='user-autocomplete')
 router.register(r'posts/(?P<post_id>\d+)/comments', CommentViewSet,
                 basename='comments')
+router.register(r'tags/(?P<tag>[^/.]+)/posts', TagPostViewSet,
+                basename='tag-posts')
 
 urlpatterns = [
     path('api/v1/api-token-auth/', views.obtain_auth_token),
@@ -0,0 +1,207 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, models
+from django.db.models.functions import Cast
+from django.utils.encoding import filepath_to_uri
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def get_file_url(serializer, storage):
+    """
+    Функция полного адреса файла по имени, как у FileField сериализатора,
+    одна на сериализатор и хранилище. У FileSystemStorage адрес MEDIA_URL
+    с хостом вычисляется один раз: storage.url() и build_absolute_uri()
+    на каждое имя — самая дорогая часть строки списка.
+    """
+    urls = serializer.__dict__.setdefault('_file_urls', {})
+    if id(storage) not in urls:
+        urls[id(storage)] = _build_file_url(
+            storage, serializer.context.get('request'))
+    return urls[id(storage)]
+
+
+def _build_file_url(storage, request):
+    if not isinstance(storage, FileSystemStorage):
+        if request is None:
+            return storage.url
+        return lambda name: request.build_absolute_uri(storage.url(name))
+    prefix = storage.url('')
+    if request is not None:
+        prefix = request.build_absolute_uri(prefix)
+    return lambda name: prefix + filepath_to_uri(name).lstrip('/')
+
+
+def _file_reader(serializer, field, storage):
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+    url = get_file_url(serializer, storage)
+    return lambda name: url(name) if name else None
+
+
+def _utc_text_reader(value):
+    return value.replace(' ', 'T') + 'Z'
+
+
+def _datetime_reader(field):
+    """
+    Столбцы и преобразование поля даты. SQLite хранит даты текстом
+    в UTC, и если вывод тоже в UTC, текст читается без разбора
+    в datetime драйвером и форматируется заменой символов.
+    """
+    column = field.source
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = getattr(field, 'timezone', field.default_timezone())
+    if (output_format is None or output_format.lower() != ISO_8601
+            or field_timezone is None):
+        return (column,), column, field.to_representation
+    if (connection.vendor == 'sqlite' and settings.USE_TZ
+            and connection.timezone_name == 'UTC'
+            and field_timezone.utcoffset(None) == timedelta(0)):
+        alias = f'{column}_utc_text'
+        text = Cast(column, models.TextField())
+        return ((alias, text),), alias, _utc_text_reader
+
+    # Часовой пояс и формат берутся один раз на запрос, а не на строку.
+    def read(value):
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return (column,), column, read
+
+
+def _is_native(serializer, field):
+    """Драйвер базы уже отдаёт значение столбца в типе вывода поля."""
+    try:
+        model_field = serializer.Meta.model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return False
+    representation = type(field).to_representation
+    if representation is serializers.CharField.to_representation:
+        return isinstance(model_field, (models.CharField, models.TextField))
+    if representation is serializers.IntegerField.to_representation:
+        return isinstance(model_field, (models.IntegerField,
+                                        models.AutoField))
+    return False
+
+
+def _get_reader(serializer, field):
+    """
+    Столбцы .values(), столбец значения и его преобразование для поля
+    или None, если поле нельзя получить из строки без модели. Столбец
+    задаётся именем или парой (псевдоним, выражение). Без столбца
+    преобразование получает всю строку, без преобразования значение
+    отдаётся как есть.
+    """
+    sources = getattr(serializer.Meta, 'sparse_sources', {})
+    if isinstance(field, serializers.SerializerMethodField):
+        method = getattr(serializer, f'{field.method_name}_from_row', None)
+        if method is None:
+            return None
+        return sources.get(field.field_name, ()), None, method
+    if (isinstance(field, (serializers.BaseSerializer,
+                           serializers.ManyRelatedField))
+            or field.source == '*' or '.' in field.source):
+        return None
+    if isinstance(field, serializers.SlugRelatedField):
+        column = f'{field.source}__{field.slug_field}'
+        return (column,), column, None
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            return None
+        return (field.source,), field.source, None
+    if isinstance(field, serializers.RelatedField):
+        return None
+    return _column_reader(serializer, field)
+
+
+def _column_reader(serializer, field):
+    column = field.source
+    if isinstance(field, serializers.FileField):
+        storage = serializer.Meta.model._meta.get_field(column).storage
+        return (column,), column, _file_reader(serializer, field, storage)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_reader(field)
+    if _is_native(serializer, field):
+        return (column,), column, None
+    return (column,), column, field.to_representation
+
+
+def get_row_readers(serializer):
+    """
+    Столбцы .values() и читатели полей сериализатора в порядке вывода
+    или None, если хотя бы одно поле так не получить. Столбцы — словарь
+    имя: выражение (None для поля модели) для select_rows().
+    """
+    columns, readers = {}, []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        reader = _get_reader(serializer, field)
+        if reader is None:
+            return None
+        field_columns, column, read = reader
+        for field_column in field_columns:
+            if isinstance(field_column, str):
+                columns.setdefault(field_column, None)
+            else:
+                columns.setdefault(*field_column)
+        readers.append((name, column, read))
+    return columns, readers
+
+
+def select_rows(queryset, columns, *fields):
+    """Выборка .values() со столбцами get_row_readers() и полями fields."""
+    names = [name for name, expression in columns.items()
+             if expression is None]
+    expressions = {name: expression for name, expression in columns.items()
+                   if expression is not None}
+    return queryset.values(*dict.fromkeys([*fields, *names]),
+                           **expressions)
+
+
+def serialize_rows(rows, readers):
+    """Словари ответа из строк .values(), как у сериализатора."""
+    data = []
+    for row in rows:
+        item = {}
+        for name, column, read in readers:
+            if column is None:
+                item[name] = read(row)
+            elif read is None:
+                item[name] = row[column]
+            else:
+                value = row[column]
+                item[name] = None if value is None else read(value)
+        data.append(item)
+    return data
+
+
+class ValuesListMixin:
+    """
+    Быстрый список: строки берутся из .values() с полями связей через
+    JOIN и собираются в словари теми же преобразованиями, что и поля
+    сериализатора, без создания моделей и обхода полей DRF на каждую
+    строку. Вычисляемые поля читаются методами <метод>_from_row
+    сериализатора. Если поле так не получить (вложенные объекты),
+    список строится обычным сериализатором.
+    """
+
+    def get_list_response(self, queryset):
+        found = get_row_readers(self.get_serializer())
+        if found is None:
+            return super().get_list_response(queryset)
+        columns, readers = found
+        ordering = [field.lstrip('-') for field in queryset.query.order_by
+                    if isinstance(field, str)]
+        rows = select_rows(queryset, columns,
+                           queryset.model._meta.pk.name, *ordering)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_rows(page, readers))
+        return Response(serialize_rows(rows, readers))
@@ -1,44 +1,80 @@
 from django.shortcuts import get_object_or_404
-from posts.models import Group, Post
+from posts.hashtags import get_tag_feed, normalize_tag
+from posts.models import Comment, Group, Post, Tag
+from posts.usernames import autocomplete_users
 from rest_framework import filters, mixins, permissions, viewsets
-from rest_framework.pagination import LimitOffsetPagination
 
+from .bulk import BulkMixin
+from .conditional import ConditionalMixin
+from .filters import PostSearchFilter, UsernamePrefixFilter
+from .pagination import KeysetPagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (CommentSerializer, FollowSerializer, GroupSerializer,
-                          PostSerializer)
+                          PostSerializer, UserAutocompleteSerializer)
+from .sparse import SparseFieldsMixin
+from .values import ValuesListMixin
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(BulkMixin, SparseFieldsMixin, ValuesListMixin,
+                  ConditionalMixin, viewsets.ModelViewSet):
     """Описание вьюсета для работы с моделью Post"""
-    queryset = Post.objects.all()
+    queryset = Post.objects.select_related('author')
     serializer_class = PostSerializer
+    include_related = {
+        'comments': Comment.objects.select_related('author').order_by(
+            'created', 'id'),
+    }
+    include_urls = {'comments': ('comments-list', 'post_id')}
 
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
                           IsAuthorOrReadOnly,)
-    pagination_class = LimitOffsetPagination
-    filter_backends = (filters.OrderingFilter,)
-    ordering_fields = ('id', 'text', 'pub_date',)
+    pagination_class = KeysetPagination
+    filter_backends = (filters.OrderingFilter, PostSearchFilter,)
+    ordering_fields = ('id', 'pub_date',)
     ordering = ('id',)
 
+    def get_list_validators(self, queryset):
+        # Выдача поиска зависит и от комментариев: её не проверяем.
+        if self.request.query_params.get(PostSearchFilter.search_param):
+            return None
+        return super().get_list_validators(queryset)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 
-class GroupViewSet(viewsets.ReadOnlyModelViewSet):
+class GroupViewSet(ValuesListMixin, ConditionalMixin,
+                   viewsets.ReadOnlyModelViewSet):
     """Описание вьюсета для работы с моделью Group"""
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class TagPostViewSet(SparseFieldsMixin, mixins.ListModelMixin,
+                     viewsets.GenericViewSet):
+    """Описание вьюсета для ленты постов с хэштегом"""
+    serializer_class = PostSerializer
+    include_related = PostViewSet.include_related
+    include_urls = PostViewSet.include_urls
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        tag = get_object_or_404(Tag, name=normalize_tag(self.kwargs['tag']))
+        return get_tag_feed(tag)
+
+
+class CommentViewSet(BulkMixin, SparseFieldsMixin, ValuesListMixin,
+                     ConditionalMixin, viewsets.ModelViewSet):
     """Описание вьюсета для работы с моделью Comment"""
     serializer_class = CommentSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
                           IsAuthorOrReadOnly,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         post = get_object_or_404(Post, pk=self.kwargs.get("post_id"))
-        new_queryset = post.comments.all()
+        new_queryset = post.comments.select_related('author').order_by(
+            'created', 'id')
         return new_queryset
 
     def perform_create(self, serializer):
@@ -51,11 +87,21 @@ class FollowViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
     """Описание вьюсета для работы с моделью Follow."""
     serializer_class = FollowSerializer
     permission_classes = (permissions.IsAuthenticated,)
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('following__username',)
+    filter_backends = (UsernamePrefixFilter,)
+    username_key_field = 'author__counters__username_key'
 
     def get_queryset(self):
-        return self.request.user.follower.all()
+        return self.request.user.follower.select_related('user', 'author')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class UserAutocompleteViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Описание вьюсета подсказок имени пользователя по началу (?q=)."""
+    serializer_class = UserAutocompleteSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return autocomplete_users(
+            self.request.query_params.get('q', '').strip())
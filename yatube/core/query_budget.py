@@ -0,0 +1,65 @@
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Код выполнил больше SQL-запросов, чем позволяет его бюджет."""
+
+
+class query_budget:
+    """
+    Бюджет SQL-запросов для блока кода или функции-обработчика.
+
+    Как контекстный менеджер проверка выполняется всегда:
+
+        with query_budget(5):
+            client.get(url)
+
+    Как декоратор функции-обработчика бюджет объявляется всегда
+    (атрибут view.query_budget), а проверяется только при включённой
+    настройке QUERY_BUDGET_ENABLED, чтобы не собирать запросы в боевом
+    режиме.
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS):
+        self.max_queries = max_queries
+        self.using = using
+        self.captured = None
+
+    def __enter__(self):
+        self.captured = CaptureQueriesContext(connections[self.using])
+        self.captured.__enter__()
+        return self.captured
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.captured.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self.captured)
+        if executed > self.max_queries:
+            queries = '\n'.join(
+                f'{num}. {query["sql"]}'
+                for num, query in enumerate(self.captured.captured_queries,
+                                            start=1)
+            )
+            raise QueryBudgetExceeded(
+                f'{executed} SQL-запросов при бюджете {self.max_queries}:\n'
+                f'{queries}'
+            )
+
+    def __call__(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+                return view(*args, **kwargs)
+            with self.__class__(self.max_queries, self.using):
+                response = view(*args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                return response
+
+        wrapper.query_budget = self.max_queries
+        return wrapper
@@ -1,5 +1,10 @@
 from django import template
-from posts.models import Group
+from django.conf import settings
+from posts.cards import render_post_cards
+from posts.hashtags import link_tags
+from posts.navigation import get_nav_groups
+from posts.page_cache import get_page_version
+from posts.thumbnails import render_picture
 
 register = template.Library()
 
@@ -10,13 +15,40 @@ def addclass(field, css):
     return field.as_widget(attrs={'class': css})
 
 
+@register.filter
+def hashtag_links(text):
+    """Текст поста с хэштегами в виде ссылок на ленты тегов."""
+    return link_tags(text)
+
+
 @register.simple_tag
 def get_cached_time():
     """Продолжительность кэширования в шаблонах"""
-    return 60*15
+    return settings.PAGE_CACHE_TIMEOUT
+
+
+@register.simple_tag
+def get_page_cache_version(path):
+    """Версия кэша страниц по адресу, сбрасываемая при изменениях."""
+    return get_page_version(path)
 
 
 @register.simple_tag
 def get_groups():
-    """Полный перечень групп организации навигации в шапке."""
-    return Group.objects.all()
+    """
+    Самые активные группы для навигации в шапке и признак того,
+    что групп больше.
+    """
+    return get_nav_groups()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов из кэша фрагментов в виде пар (пост, html)."""
+    return render_post_cards(posts)
+
+
+@register.simple_tag
+def post_picture(post):
+    """Картинка поста с вариантами разной ширины и формата."""
+    return render_picture(post)
@@ -0,0 +1,232 @@
+import json
+import os
+import random
+import time
+
+from api.urls import router
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase, tag
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from posts import urls as posts_urls
+from posts.counters import reconcile_counters
+from posts.hashtags import backfill_tags
+from posts.models import Comment, Follow, Group, Post, User
+from posts.timeline import rebuild_timeline
+from rest_framework_simplejwt.tokens import AccessToken
+from users import urls as users_urls
+
+from .utils import timing_asserts_enabled
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__),
+                             'performance_baseline.json')
+UPDATE_BASELINE_ENV: str = 'PERF_BASELINE_UPDATE'
+
+SEED: int = 2022
+USERS_CNT: int = 2000
+GROUPS_CNT: int = 20
+POSTS_CNT: int = 5000
+COMMENTS_CNT: int = 5000
+FOLLOWS_CNT: int = 5000
+HOT_POST_COMMENTS_CNT: int = 300
+READER_FOLLOWS_CNT: int = 50
+
+RUNS: int = 3
+QUERIES_TOLERANCE: int = 0
+TIME_TOLERANCE: float = 3.0
+TIME_FLOOR: float = 0.05
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL, подсчитывающая запросы без их хранения."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def get_route_names():
+    """Имена всех именованных маршрутов posts, users и роутера api."""
+    names = [f'posts:{url.name}' for url in posts_urls.urlpatterns]
+    names += [f'users:{url.name}' for url in users_urls.urlpatterns]
+    for url in router.urls:
+        if 'format' not in url.pattern.regex.groupindex:
+            names.append(url.name)
+    return sorted(set(names))
+
+
+@tag('performance')
+class RoutesPerformanceTest(TestCase):
+    """
+    Регрессионный набор по числу SQL-запросов и времени ответа.
+    Базовые значения хранятся в performance_baseline.json; пересобрать их
+    можно, запустив тесты с переменной окружения PERF_BASELINE_UPDATE=1.
+    Время ответа сверяется только при PERF_TIMING=1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(SEED)
+        User.objects.bulk_create(
+            User(username=f'user{i}', first_name=f'Имя{i}')
+            for i in range(USERS_CNT)
+        )
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}',
+                  description=f'Описание {i}')
+            for i in range(GROUPS_CNT)
+        )
+        user_ids = list(User.objects.values_list('id', flat=True))
+        group_ids = list(Group.objects.values_list('id', flat=True))
+        Post.objects.bulk_create(
+            Post(text=f'Пост №{i} #тег{i % 50}',
+                 author_id=rnd.choice(user_ids),
+                 group_id=rnd.choice(group_ids + [None]))
+            for i in range(POSTS_CNT)
+        )
+        post_ids = list(Post.objects.values_list('id', flat=True))
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий №{i}',
+                    author_id=rnd.choice(user_ids),
+                    post_id=rnd.choice(post_ids))
+            for i in range(COMMENTS_CNT)
+        )
+        follows = set()
+        while len(follows) < FOLLOWS_CNT:
+            user_id, author_id = rnd.sample(user_ids, 2)
+            follows.add((user_id, author_id))
+
+        cls.reader = User.objects.get(username='user0')
+        cls.post = Post.objects.create(text='Горячий пост',
+                                       author=cls.reader,
+                                       group_id=group_ids[0])
+        Comment.objects.bulk_create(
+            Comment(text=f'Ответ №{i}', author_id=rnd.choice(user_ids),
+                    post=cls.post)
+            for i in range(HOT_POST_COMMENTS_CNT)
+        )
+        cls.comment = cls.post.comments.first()
+        followed = [user_id for user_id in user_ids[1:]
+                    if (cls.reader.id, user_id) not in follows]
+        follows.update(
+            (cls.reader.id, author_id)
+            for author_id in followed[:READER_FOLLOWS_CNT]
+        )
+        Follow.objects.bulk_create(
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in follows
+        )
+        cls.followed = User.objects.get(id=followed[0])
+        cls.stranger = User.objects.get(id=followed[READER_FOLLOWS_CNT])
+        cls.group = Group.objects.get(id=group_ids[0])
+        reconcile_counters()
+        backfill_tags()
+        rebuild_timeline(cls.reader.id)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(BASELINE_PATH, encoding='utf-8') as baseline:
+            cls.baseline = json.load(baseline)
+        cls.measured = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.environ.get(UPDATE_BASELINE_ENV):
+            with open(BASELINE_PATH, 'w', encoding='utf-8') as baseline:
+                json.dump(cls.measured, baseline, indent=2, sort_keys=True,
+                          ensure_ascii=False)
+                baseline.write('\n')
+        super().tearDownClass()
+
+    def route_kwargs(self, name):
+        """Аргументы маршрута для засеянного набора данных."""
+        kwargs = {
+            'posts:group_list': {'slug': self.group.slug},
+            'posts:profile': {'username': self.followed.username},
+            'posts:profile_follow': {'username': self.stranger.username},
+            'posts:profile_unfollow': {'username': self.followed.username},
+            'users:password_reset_confirm': {
+                'uidb64': urlsafe_base64_encode(force_bytes(self.reader.pk)),
+                'token': default_token_generator.make_token(self.reader),
+            },
+            'post-detail': {'pk': self.post.pk},
+            'group-detail': {'pk': self.group.pk},
+            'comments-list': {'post_id': self.post.pk},
+            'comments-bulk': {'post_id': self.post.pk},
+            'comments-detail': {'post_id': self.post.pk,
+                                'pk': self.comment.pk},
+            'posts:tag_feed': {'name': 'тег1'},
+            'tag-posts-list': {'tag': 'тег1'},
+        }
+        if name in kwargs:
+            return kwargs[name]
+        if name in ('posts:post_detail', 'posts:post_edit',
+                    'posts:post_comments', 'posts:add_comment'):
+            return {'post_id': self.post.pk}
+        return {}
+
+    def route_query(self, name):
+        """Параметры строки запроса для маршрута."""
+        queries = {
+            'posts:search': {'q': 'тег1'},
+            'user-autocomplete-list': {'q': 'user1'},
+        }
+        return queries.get(name, {})
+
+    def make_client(self, name):
+        client = Client()
+        if ':' in name:
+            client.force_login(self.reader)
+        else:
+            token = AccessToken.for_user(self.reader)
+            client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        return client
+
+    def measure(self, name):
+        """Число запросов и минимальное время холодного GET-запроса."""
+        url = reverse(name, kwargs=self.route_kwargs(name))
+        queries, timings = None, []
+        for _ in range(RUNS):
+            client = self.make_client(name)
+            cache.clear()
+            counter = QueryCounter()
+            with transaction.atomic():
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    response = client.get(url, self.route_query(name))
+                    timings.append(time.perf_counter() - started)
+                transaction.set_rollback(True)
+            self.assertLess(response.status_code, 500, url)
+            queries = counter.queries
+        return {'queries': queries, 'seconds': round(min(timings), 4)}
+
+    def test_routes_do_not_regress(self):
+        """Маршруты не превышают базовые число запросов и время ответа."""
+        for name in get_route_names():
+            with self.subTest(route=name):
+                result = self.measure(name)
+                self.measured[name] = result
+                if os.environ.get(UPDATE_BASELINE_ENV):
+                    continue
+                if name not in self.baseline:
+                    self.fail(f'Нет базового значения для {name}')
+                expected = self.baseline[name]
+                self.assertLessEqual(
+                    result['queries'],
+                    expected['queries'] + QUERIES_TOLERANCE,
+                    f'{name}: рост числа SQL-запросов'
+                )
+                if not timing_asserts_enabled():
+                    continue
+                self.assertLessEqual(
+                    result['seconds'],
+                    max(expected['seconds'] * TIME_TOLERANCE, TIME_FLOOR),
+                    f'{name}: рост времени ответа'
+                )
@@ -0,0 +1,142 @@
+import gc
+import json
+import time
+
+from api import renderers
+from api.serializers import (CommentSerializer, GroupSerializer,
+                             PostSerializer)
+from api.values import get_row_readers, select_rows, serialize_rows
+from django.test import RequestFactory, TestCase, tag
+from django.utils.text import compress_string
+from posts.models import Comment, Group, Post, User
+from rest_framework.renderers import JSONRenderer
+
+from .utils import timing_asserts_enabled
+
+ROWS_CNT: int = 100
+RUNS: int = 10
+MIN_SPEEDUP: float = 3.0
+MIN_RENDER_SPEEDUP: float = 3.0
+MIN_GZIP_RATIO: float = 4.0
+VARIANTS: str = json.dumps([
+    {'name': f'posts/variants/ab/photo-{width}.jpg', 'width': width,
+     'format': 'jpeg'}
+    for width in (480, 960)
+])
+
+
+@tag('performance')
+class SerializationBenchmark(TestCase):
+    """
+    Скорость построения строк списка через .values() против сериализатора
+    на странице из ROWS_CNT строк: вывод совпадает побайтно, а постов,
+    комментариев и групп в секунду получается не меньше чем
+    в MIN_SPEEDUP раз больше. Отдельно сравниваются рендереры JSON
+    и размер страницы до и после gzip. Ускорение проверяется только
+    при PERF_TIMING=1, совпадение вывода и сжатие — всегда.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(username=f'user{i}') for i in range(10))
+        authors = list(User.objects.all())
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}',
+                  description=f'Описание группы №{i}')
+            for i in range(ROWS_CNT)
+        )
+        group = Group.objects.first()
+        Post.objects.bulk_create(
+            Post(text=f'Пост №{i} ' * 20, author=authors[i % 10],
+                 group=group if i % 2 else None,
+                 image=f'posts/ab/{i}.jpg' if i % 3 else '',
+                 image_width=960, image_height=640, image_color='#102030',
+                 image_variants=VARIANTS if i % 3 else '')
+            for i in range(ROWS_CNT)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий №{i}', author=authors[i % 10],
+                    post=cls.post)
+            for i in range(ROWS_CNT)
+        )
+
+    def measure(self, *builds):
+        """
+        Лучшее время каждого построения: прогоны чередуются, чтобы фон
+        машины одинаково влиял на оба пути, а сборка мусора, как
+        в timeit, не попадает в замер.
+        """
+        timings = [[] for _ in builds]
+        results = [build() for build in builds]
+        gc.disable()
+        try:
+            for _ in range(RUNS):
+                for build, timing in zip(builds, timings):
+                    started = time.perf_counter()
+                    build()
+                    timing.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+        return [ROWS_CNT / min(timing) for timing in timings], results
+
+    def assert_faster(self, serializer_class, queryset):
+        context = {'request': RequestFactory().get('/api/v1/')}
+
+        def slow():
+            return serializer_class(
+                queryset.all(), many=True, context=context).data
+
+        def fast():
+            serializer = serializer_class(context=context)
+            columns, readers = get_row_readers(serializer)
+            return serialize_rows(select_rows(queryset, columns), readers)
+
+        (slow_rate, fast_rate), (slow_data, fast_data) = self.measure(
+            slow, fast)
+        self.assertEqual(JSONRenderer().render(fast_data),
+                         JSONRenderer().render(slow_data))
+        if not timing_asserts_enabled():
+            return
+        self.assertGreaterEqual(
+            fast_rate / slow_rate, MIN_SPEEDUP,
+            f'{serializer_class.__name__}: {fast_rate:.0f} строк/с '
+            f'против {slow_rate:.0f} строк/с')
+
+    def test_posts(self):
+        """Посты строятся из .values() быстрее сериализатора."""
+        self.assert_faster(PostSerializer,
+                           Post.objects.select_related('author')
+                           .order_by('id'))
+
+    def test_comments(self):
+        """Комментарии строятся из .values() быстрее сериализатора."""
+        self.assert_faster(CommentSerializer,
+                           self.post.comments.select_related('author')
+                           .order_by('created', 'id'))
+
+    def test_groups(self):
+        """Группы строятся из .values() быстрее сериализатора."""
+        self.assert_faster(GroupSerializer, Group.objects.order_by('id'))
+
+    def test_render(self):
+        """
+        FastJSONRenderer пишет страницу постов теми же байтами быстрее
+        JSONRenderer, а gzip сокращает её на проводе.
+        """
+        data = PostSerializer(
+            Post.objects.select_related('author').order_by('id'),
+            many=True, context={'request': RequestFactory().get('/')}).data
+        (slow_rate, fast_rate), (slow_body, fast_body) = self.measure(
+            lambda: JSONRenderer().render(data),
+            lambda: renderers.FastJSONRenderer().render(data))
+        self.assertEqual(fast_body, slow_body)
+        if renderers.orjson is not None and timing_asserts_enabled():
+            self.assertGreaterEqual(
+                fast_rate / slow_rate, MIN_RENDER_SPEEDUP,
+                f'{fast_rate:.0f} строк/с против {slow_rate:.0f} строк/с')
+        compressed = compress_string(slow_body)
+        self.assertGreaterEqual(
+            len(slow_body) / len(compressed), MIN_GZIP_RATIO,
+            f'{len(slow_body)} байт, сжато {len(compressed)} байт')
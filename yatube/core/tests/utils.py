@@ -0,0 +1,13 @@
+import os
+
+TIMING_ENV: str = 'PERF_TIMING'
+
+
+def timing_asserts_enabled():
+    """
+    Проверки времени и ускорения зависят от загрузки машины, поэтому
+    включаются только явно: PERF_TIMING=1 python manage.py test
+    --tag performance. По умолчанию проверяется только число запросов
+    и совпадение вывода.
+    """
+    return bool(os.environ.get(TIMING_ENV))
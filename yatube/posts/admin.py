@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Comment, Group, Post
+from .search import filter_search
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +17,10 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет посты по полнотекстовому индексу вместо LIKE."""
+        return filter_search(queryset, search_term), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     """Класс, конфигурирующий приложение posts."""
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,58 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import ImageBlob, Post
+from .storage import post_image_storage
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_blob(name):
+    """Увеличивает число постов, ссылающихся на файл картинки."""
+    ImageBlob.objects.bulk_create([ImageBlob(name=name)],
+                                  ignore_conflicts=True)
+    ImageBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def release_blob(name):
+    """
+    Уменьшает число ссылок на файл картинки. Когда ссылок не остаётся,
+    после фиксации транзакции удаляются файл и его миниатюры.
+    """
+    ImageBlob.objects.filter(name=name, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1)
+    deleted, _ = ImageBlob.objects.filter(name=name, ref_count=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: delete_orphan_blob(name))
+
+
+def delete_orphan_blob(name):
+    """Удаляет файл картинки с миниатюрами, если на него снова не сослались."""
+    if ImageBlob.objects.filter(name=name).exists():
+        return
+    try:
+        delete_thumbnails(ImageFile(name, storage=post_image_storage))
+    except Exception:
+        logger.exception('Не удалось удалить файл картинки %s', name)
+
+
+def reconcile_blobs():
+    """
+    Пересчитывает ссылки на файлы картинок по постам.
+    Возвращает число исправленных записей.
+    """
+    actual = dict(Post.objects.exclude(image='').order_by()
+                  .values_list('image').annotate(total=Count('id')))
+    stored = dict(ImageBlob.objects.values_list('name', 'ref_count'))
+    stale = stored.keys() - actual.keys()
+    ImageBlob.objects.filter(name__in=stale).delete()
+    drift = [ImageBlob(name=name, ref_count=total)
+             for name, total in actual.items() if stored.get(name) != total]
+    ImageBlob.objects.filter(
+        name__in=[blob.name for blob in drift]).delete()
+    ImageBlob.objects.bulk_create(drift)
+    return len(stale) + len(drift)
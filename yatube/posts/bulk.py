@@ -0,0 +1,57 @@
+from django.db import connections, router, transaction
+from django.db.models.signals import post_save, pre_save
+
+
+def _fetch_pks(model, objs, using):
+    # Без RETURNING (SQLite) id созданных записей неизвестны. Запись
+    # блокирует базу до конца транзакции, поэтому наши строки — последние.
+    pks = list(model._default_manager.using(using).order_by('-pk')
+               .values_list('pk', flat=True)[:len(objs)])
+    for obj, pk in zip(objs, reversed(pks)):
+        obj.pk = pk
+
+
+def bulk_create(model, objs, batch_size=None):
+    """
+    Создаёт объекты одним bulk_create и рассылает для каждого pre_save
+    и post_save, чтобы сработали счётчики, ленты, теги и сброс кэшей.
+    Вызывается внутри транзакции.
+    """
+    using = router.db_for_write(model)
+    assert connections[using].in_atomic_block, (
+        'bulk_create нужно вызывать внутри transaction.atomic')
+    for obj in objs:
+        pre_save.send(sender=model, instance=obj, raw=False, using=using,
+                      update_fields=None)
+    model._default_manager.using(using).bulk_create(objs, batch_size)
+    if any(obj.pk is None for obj in objs):
+        _fetch_pks(model, objs, using)
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = using
+        post_save.send(sender=model, instance=obj, created=True, raw=False,
+                       using=using, update_fields=None)
+    return objs
+
+
+def bulk_update(model, objs, fields, batch_size=None):
+    """
+    Сохраняет поля fields объектов одним bulk_update, обновляя поля
+    auto_now, и рассылает для каждого pre_save и post_save.
+    """
+    using = router.db_for_write(model)
+    auto_now = [field for field in model._meta.concrete_fields
+                if getattr(field, 'auto_now', False)]
+    fields = set(fields) | {field.name for field in auto_now}
+    for obj in objs:
+        pre_save.send(sender=model, instance=obj, raw=False, using=using,
+                      update_fields=frozenset(fields))
+        for field in auto_now:
+            field.pre_save(obj, add=False)
+    with transaction.atomic(using=using):
+        model._default_manager.using(using).bulk_update(
+            objs, list(fields), batch_size)
+    for obj in objs:
+        post_save.send(sender=model, instance=obj, created=False, raw=False,
+                       using=using, update_fields=frozenset(fields))
+    return objs
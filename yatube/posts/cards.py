@@ -0,0 +1,69 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE: str = 'posts/includes/post_list.html'
+CARD_KEY: str = 'post_card:{post_id}:{versions}'
+VERSION_KEY: str = 'post_card:version:{kind}:{pk}'
+
+
+def _version_key(kind, pk):
+    return VERSION_KEY.format(kind=kind, pk=pk)
+
+
+def bump_card_version(kind, pk):
+    """
+    Объявляет устаревшими карточки, зависящие от объекта kind с ключом pk
+    (post, group или user). Версия меняется сразу и ещё раз после
+    фиксации транзакции, чтобы не закэшировать карточку, отрисованную
+    параллельным запросом по незафиксированным данным.
+    """
+    key = _version_key(kind, pk)
+    cache.set(key, uuid.uuid4().hex, None)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def _card_dependencies(post):
+    return (
+        _version_key('post', post.pk),
+        _version_key('group', post.group_id),
+        _version_key('user', post.author_id),
+    )
+
+
+def render_post_cards(posts):
+    """
+    Возвращает пары (пост, html карточки). Карточки берутся из кэша
+    одним запросом, перерисовываются только изменившиеся.
+    """
+    posts = list(posts)
+    versions = _get_versions(list({
+        key for post in posts for key in _card_dependencies(post)}))
+    card_keys = [
+        CARD_KEY.format(post_id=post.pk, versions='.'.join(
+            versions[key] for key in _card_dependencies(post)))
+        for post in posts
+    ]
+    cards = cache.get_many(card_keys)
+    rendered = {}
+    for post, key in zip(posts, card_keys):
+        if key not in cards:
+            rendered[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return [(post, mark_safe(cards[key]))
+            for post, key in zip(posts, card_keys)]
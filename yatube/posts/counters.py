@@ -0,0 +1,69 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserCounters
+from .usernames import get_username_key
+
+COUNTED_RELATIONS = {
+    'posts_count': (Post, 'author_id'),
+    'comments_count': (Comment, 'author_id'),
+    'followers_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+}
+
+
+def bump_counter(user_id, field, delta):
+    """
+    Атомарно изменяет счётчик пользователя на delta, не опуская его ниже
+    нуля. Если строки счётчиков ещё нет, она создаётся пересчётом.
+    """
+    counters = UserCounters.objects.filter(user_id=user_id)
+    if delta < 0:
+        counters = counters.filter(**{f'{field}__gte': -delta})
+    updated = counters.update(**{field: F(field) + delta})
+    if not updated and delta > 0:
+        reconcile_counters(User.objects.filter(id=user_id))
+
+
+def _count_subquery(model, user_field):
+    rows = (model.objects.filter(**{user_field: OuterRef('pk')})
+            .order_by()
+            .values(user_field)
+            .annotate(total=Count('id'))
+            .values('total'))
+    return Coalesce(Subquery(rows), 0)
+
+
+def reconcile_counters(users=None):
+    """
+    Пересчитывает счётчики и ключи поиска по фактическим строкам в БД.
+    Возвращает количество пользователей, у которых счётчики расходились.
+    """
+    if users is None:
+        users = User.objects.all()
+    actual = users.annotate(**{
+        field: _count_subquery(model, user_field)
+        for field, (model, user_field) in COUNTED_RELATIONS.items()
+    }).values('id', 'username', *COUNTED_RELATIONS)
+    stored = {
+        counters.user_id: counters
+        for counters in UserCounters.objects.filter(user__in=users)
+    }
+    repaired = 0
+    for row in actual:
+        counters = stored.get(row['id'])
+        if counters is None:
+            counters = UserCounters(user_id=row['id'])
+        username_key = get_username_key(row['username'])
+        drift = [field for field in COUNTED_RELATIONS
+                 if getattr(counters, field) != row[field]]
+        if counters.username_key != username_key:
+            drift.append('username_key')
+        if counters.pk is not None and not drift:
+            continue
+        for field in COUNTED_RELATIONS:
+            setattr(counters, field, row[field])
+        counters.username_key = username_key
+        counters.save()
+        repaired += 1
+    return repaired
@@ -0,0 +1,29 @@
+from django.db.models import BigIntegerField, F, Subquery
+
+from .models import DeletionVersion
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def bump_deletion_version(model):
+    """
+    Отмечает удаление записи модели: по наибольшим id и отметкам
+    изменения оставшихся записей удаление не видно.
+    """
+    versions = DeletionVersion.objects.filter(label=_label(model))
+    if not versions.update(version=F('version') + 1):
+        DeletionVersion.objects.bulk_create(
+            [DeletionVersion(label=_label(model))], ignore_conflicts=True)
+        versions.update(version=F('version') + 1)
+
+
+def deletion_version(model):
+    """
+    Подзапрос с версией, меняющейся при каждом удалении записи модели;
+    NULL, пока записи модели не удалялись.
+    """
+    return Subquery(
+        DeletionVersion.objects.filter(label=_label(model)).values('version'),
+        output_field=BigIntegerField())
@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Comment, Post
+from .uploads import get_too_large_message, process_post_image
 
 
 class PostForm(forms.ModelForm):
@@ -9,6 +11,19 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if getattr(self.files.get('image'), 'oversized', False):
+            self.fields['image'].error_messages['invalid_image'] = (
+                get_too_large_message())
+
+    def clean_image(self):
+        """Проверяет и переупаковывает новую картинку."""
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return process_post_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """Форма создания нового комментария на основе модели Comment"""
@@ -0,0 +1,106 @@
+import re
+
+from django.db.models import F
+from django.urls import reverse
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from .models import TAG_MAX_LEN, Post, PostTag, Tag
+
+TAG_RE = re.compile(r'(?<![\w&/#])#(\w+)')
+TAG_ORDERING: tuple = ('-tag_pub_date', '-tag_post_id')
+
+
+def normalize_tag(name):
+    """Приводит имя тега к виду, в котором оно хранится."""
+    return name.casefold()
+
+
+def extract_tags(text):
+    """Множество нормализованных хэштегов из текста."""
+    return {normalize_tag(name) for name in TAG_RE.findall(text)
+            if len(name) <= TAG_MAX_LEN}
+
+
+def link_tags(text):
+    """Экранированный текст, в котором хэштеги — ссылки на ленты тегов."""
+    parts = []
+    last = 0
+    for match in TAG_RE.finditer(text):
+        name = match.group(1)
+        if len(name) > TAG_MAX_LEN:
+            continue
+        url = reverse('posts:tag_feed', kwargs={'name': normalize_tag(name)})
+        parts.append(escape(text[last:match.start()]))
+        parts.append(format_html('<a href="{}">#{}</a>', url, name))
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return mark_safe(''.join(parts))
+
+
+def get_tags(names):
+    """Теги с указанными именами; недостающие создаются одним запросом."""
+    Tag.objects.bulk_create([Tag(name=name) for name in names],
+                            ignore_conflicts=True)
+    return Tag.objects.filter(name__in=names)
+
+
+def sync_post_tags(post, created=False):
+    """
+    Приводит связи поста с тегами в соответствие с его текстом: удаляет
+    пропавшие теги и добавляет новые, не трогая остальные.
+    """
+    names = extract_tags(post.text)
+    current = {}
+    if not created:
+        current = dict(PostTag.objects.filter(post=post).values_list(
+            'tag__name', 'id'))
+    removed = [link_id for name, link_id in current.items()
+               if name not in names]
+    if removed:
+        PostTag.objects.filter(id__in=removed).delete()
+    added = names - current.keys()
+    if added:
+        PostTag.objects.bulk_create(
+            PostTag(post=post, tag=tag, pub_date=post.pub_date)
+            for tag in get_tags(added)
+        )
+
+
+def backfill_tags(batch_size=1000):
+    """
+    Расставляет теги всем существующим постам пачками по batch_size.
+    Уже существующие связи не дублируются. Возвращает число
+    обработанных постов.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        batch = list(Post.objects.filter(id__gt=last_id).order_by('id')
+                     .values_list('id', 'text', 'pub_date')[:batch_size])
+        if not batch:
+            return processed
+        last_id = batch[-1][0]
+        processed += len(batch)
+        post_names = [(post_id, pub_date, extract_tags(text))
+                      for post_id, text, pub_date in batch]
+        names = set().union(*(names for _, _, names in post_names))
+        if not names:
+            continue
+        tag_ids = dict(get_tags(names).values_list('name', 'id'))
+        PostTag.objects.bulk_create([
+            PostTag(post_id=post_id, tag_id=tag_ids[name], pub_date=pub_date)
+            for post_id, pub_date, post_tags in post_names
+            for name in post_tags
+        ], ignore_conflicts=True)
+
+
+def get_tag_feed(tag):
+    """
+    Посты тега в порядке (дата, id) по столбцам связи, чтобы выборка
+    шла по индексу (тег, дата) без сортировки.
+    """
+    return Post.objects.for_feed().filter(post_tags__tag=tag).annotate(
+        tag_pub_date=F('post_tags__pub_date'),
+        tag_post_id=F('post_tags__post_id'),
+    ).order_by(*TAG_ORDERING)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.hashtags import backfill_tags
+
+
+class Command(BaseCommand):
+    """Команда расстановки хэштегов существующим постам."""
+    help = 'Разбирает хэштеги в текстах всех постов и сохраняет связи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число постов, обрабатываемых за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        processed = backfill_tags(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {processed}'))
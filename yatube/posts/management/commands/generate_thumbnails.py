@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import generate_missing_thumbnails
+
+
+class Command(BaseCommand):
+    """Команда подготовки недостающих миниатюр картинок постов."""
+    help = 'Готовит миниатюры картинок постов, у которых их ещё нет.'
+
+    def handle(self, *args, **options):
+        generated = generate_missing_thumbnails()
+        self.stdout.write(self.style.SUCCESS(
+            f'Подготовлено миниатюр: {generated}'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from posts.models import User
+from posts.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    """Команда пересборки материализованных лент подписок."""
+    help = 'Пересобирает ленты подписок всех или указанных пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Имена пользователей; по умолчанию — все подписчики.',
+        )
+
+    def handle(self, *args, **options):
+        usernames = options['usernames']
+        users = User.objects.all()
+        if usernames:
+            users = users.filter(username__in=usernames)
+            missing = set(usernames) - set(
+                users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(
+                    f'Пользователи не найдены: {", ".join(sorted(missing))}')
+        else:
+            users = users.filter(
+                Q(follower__isnull=False) | Q(timeline__isnull=False)
+            ).distinct()
+        rebuilt = 0
+        for user_id in list(users.values_list('id', flat=True)):
+            rebuild_timeline(user_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано лент: {rebuilt}'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.blobs import reconcile_blobs
+from posts.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """Команда сверки денормализованных счётчиков."""
+    help = ('Пересчитывает счётчики постов, комментариев и подписок '
+            'и ссылки постов на файлы картинок.')
+
+    def handle(self, *args, **options):
+        repaired = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {repaired}'))
+        repaired = reconcile_blobs()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено ссылок на картинки: {repaired}'))
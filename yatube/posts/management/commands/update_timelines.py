@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import (demote_celebrity, get_demoted_ids,
+                            trim_all_timelines)
+
+
+class Command(BaseCommand):
+    """Команда фонового обслуживания материализованных лент подписок."""
+    help = ('Раскладывает по лентам посты авторов, переставших быть '
+            'популярными, и обрезает ленты до TIMELINE_MAX_ENTRIES. '
+            'Запускается по расписанию.')
+
+    def handle(self, *args, **options):
+        demoted = sum(1 for author_id in get_demoted_ids()
+                      if demote_celebrity(author_id))
+        self.stdout.write(self.style.SUCCESS(
+            f'Возвращено в ленты авторов: {demoted}'))
+        trim_all_timelines()
+        self.stdout.write(self.style.SUCCESS('Ленты обрезаны'))
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import posts.models
+from posts.search_sql import (CREATE_TABLE_SQL, CREATE_TRIGGERS_SQL,
+                              DROP_TABLE_SQL, DROP_TRIGGERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TABLE_SQL + CREATE_TRIGGERS_SQL,
+                          reverse_sql=DROP_TRIGGERS_SQL + DROP_TABLE_SQL),
+        migrations.CreateModel(
+            name='PostSearch',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='posts.Post')),
+                ('text', models.TextField()),
+                ('comments', models.TextField()),
+                ('document', posts.models.SearchDocumentField(db_column='posts_postsearch')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'posts_postsearch',
+                'managed': False,
+            },
+        ),
+    ]
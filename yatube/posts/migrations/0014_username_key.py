@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+def fill_username_keys(apps, schema_editor):
+    UserCounters = apps.get_model('posts', 'UserCounters')
+    counters = list(UserCounters.objects.select_related('user'))
+    for row in counters:
+        row.username_key = row.user.username.casefold()
+    UserCounters.objects.bulk_update(counters, ['username_key'],
+                                     batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounters',
+            name='username_key',
+            field=models.CharField(default='', max_length=150, verbose_name='Имя пользователя в нижнем регистре'),
+        ),
+        migrations.AddIndex(
+            model_name='usercounters',
+            index=models.Index(fields=['username_key', '-followers_count', 'user'], name='counters_username_key_idx'),
+        ),
+        migrations.RunPython(fill_username_keys, migrations.RunPython.noop),
+    ]
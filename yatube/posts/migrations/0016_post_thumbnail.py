@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:06
+
+from django.db import migrations, models
+from posts.search_sql import preserve_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_tags'),
+    ]
+
+    operations = preserve_search_triggers(
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='', verbose_name='Миниатюра'),
+        ),
+    )
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:09
+
+from django.db import migrations, models
+from posts.search_sql import preserve_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_thumbnail'),
+    ]
+
+    operations = preserve_search_triggers(
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, editable=False, help_text='JSON-список вариантов: ширина, формат и имя файла', verbose_name='Варианты картинки'),
+        ),
+    )
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import posts.models
+from posts.search_sql import (CREATE_SPLIT_TABLES_SQL,
+                              CREATE_SPLIT_TRIGGERS_SQL, CREATE_TABLE_SQL,
+                              CREATE_TRIGGERS_SQL, DROP_SPLIT_TABLES_SQL,
+                              DROP_SPLIT_TRIGGERS_SQL, DROP_TABLE_SQL,
+                              DROP_TRIGGERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_updated'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            DROP_TRIGGERS_SQL + DROP_TABLE_SQL
+            + CREATE_SPLIT_TABLES_SQL + CREATE_SPLIT_TRIGGERS_SQL,
+            reverse_sql=DROP_SPLIT_TRIGGERS_SQL + DROP_SPLIT_TABLES_SQL
+            + CREATE_TABLE_SQL + CREATE_TRIGGERS_SQL,
+        ),
+        migrations.RemoveField(
+            model_name='postsearch',
+            name='comments',
+        ),
+        migrations.CreateModel(
+            name='CommentSearch',
+            fields=[
+                ('comment', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='posts.Comment')),
+                ('text', models.TextField()),
+                ('document', posts.models.SearchDocumentField(db_column='posts_commentsearch')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'posts_commentsearch',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_comment_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100, unique=True, verbose_name='Модель')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Версия удалений')),
+            ],
+            options={
+                'verbose_name': 'Версия удалений',
+                'verbose_name_plural': 'Версии удалений',
+            },
+        ),
+    ]
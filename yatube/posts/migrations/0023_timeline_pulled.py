@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_celebrities(apps, schema_editor):
+    UserCounters = apps.get_model('posts', 'UserCounters')
+    UserCounters.objects.filter(
+        followers_count__gte=settings.TIMELINE_CELEBRITY_THRESHOLD,
+    ).update(timeline_pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_deletion_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounters',
+            name='timeline_pulled',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Посты подмешиваются в ленты при чтении'),
+        ),
+        migrations.RunPython(mark_celebrities, migrations.RunPython.noop),
+    ]
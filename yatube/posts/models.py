@@ -1,10 +1,26 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 
+from .storage import post_image_storage
+
 User = get_user_model()
 
 TEXT_LEN: int = 15
+TAG_MAX_LEN: int = 50
+
+
+def parse_image_variants(value):
+    """Варианты картинки из JSON-столбца image_variants."""
+    try:
+        variants = json.loads(value or '[]')
+    except ValueError:
+        return []
+    return variants if isinstance(variants, list) else []
 
 
 class Group(models.Model):
@@ -12,6 +28,10 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    updated = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True,
+    )
 
     def get_absolute_url(self):
         return reverse('posts:group_list', kwargs={'slug': self.slug})
@@ -24,6 +44,24 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+class PostQuerySet(models.QuerySet):
+    """Набор запросов к постам."""
+
+    def for_feed(self):
+        """
+        Посты для ленты: автор и группа загружаются тем же запросом,
+        число комментариев — коррелированным подзапросом только для
+        выбранных строк.
+        """
+        comments = (Comment.objects.filter(post=OuterRef('pk'))
+                    .order_by()
+                    .values('post')
+                    .annotate(total=Count('id'))
+                    .values('total'))
+        return self.select_related('author', 'group').annotate(
+            comments_count=Coalesce(Subquery(comments), 0))
+
+
 class Post(models.Model):
     """Модель для работы с постами."""
     text = models.TextField(
@@ -34,6 +72,11 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True,
+        db_index=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -52,12 +95,60 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True
     )
+    thumbnail = models.ImageField(
+        'Миниатюра',
+        blank=True,
+        editable=False,
+    )
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False,
+        help_text='JSON-список вариантов: ширина, формат и имя файла',
+    )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    image_size = models.PositiveIntegerField(
+        'Размер картинки в байтах',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    image_color = models.CharField(
+        'Основной цвет картинки',
+        max_length=7,
+        blank=True,
+        editable=False,
+    )
+    image_placeholder = models.TextField(
+        'Превью картинки низкого качества',
+        blank=True,
+        editable=False,
+        help_text='data:-адрес крошечной копии картинки',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def get_absolute_url(self):
         return reverse('posts:post_detail', kwargs={'post_id': self.pk})
 
+    def get_image_variants(self):
+        """Готовые варианты картинки разной ширины и формата."""
+        return parse_image_variants(self.image_variants)
+
     def __str__(self):
         return self.text[:TEXT_LEN]
 
@@ -65,6 +156,15 @@ class Post(models.Model):
         ordering = ("-pub_date",)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['image'], name='post_image_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -89,6 +189,10 @@ class Comment(models.Model):
         verbose_name='Опубликовано',
         auto_now_add=True,
     )
+    updated = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True,
+    )
 
     def __str__(self):
         return self.text[:TEXT_LEN]
@@ -96,6 +200,10 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -120,3 +228,250 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique follow')
         ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class Timeline(models.Model):
+    """
+    Модель материализованной ленты подписок: запись создаётся для каждого
+    подписчика в момент публикации поста.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique timeline entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+
+class UserCounters(models.Model):
+    """
+    Модель денормализованных счётчиков пользователя, обновляемых
+    при создании и удалении постов, комментариев и подписок, ключа
+    поиска по имени пользователя и признака популярного автора.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='counters',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Постов',
+        default=0,
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        db_index=True,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Подписок',
+        default=0,
+    )
+    username_key = models.CharField(
+        verbose_name='Имя пользователя в нижнем регистре',
+        max_length=150,
+        default='',
+    )
+    timeline_pulled = models.BooleanField(
+        verbose_name='Посты подмешиваются в ленты при чтении',
+        default=False,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+        indexes = [
+            models.Index(fields=['username_key', '-followers_count', 'user'],
+                         name='counters_username_key_idx'),
+        ]
+
+
+class Tag(models.Model):
+    """Модель для работы с хэштегами."""
+    name = models.CharField(
+        verbose_name='Тег',
+        max_length=TAG_MAX_LEN,
+        unique=True,
+    )
+
+    def get_absolute_url(self):
+        return reverse('posts:tag_feed', kwargs={'name': self.name})
+
+    def __str__(self):
+        return f'#{self.name}'
+
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+
+class PostTag(models.Model):
+    """
+    Модель связи поста с хэштегом. Дата публикации поста продублирована,
+    чтобы лента тега читалась по индексу (тег, дата).
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Пост',
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Тег',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Тег поста'
+        verbose_name_plural = 'Теги постов'
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'tag'],
+                                    name='unique post tag')
+        ]
+        indexes = [
+            models.Index(fields=['tag', '-pub_date', '-post'],
+                         name='posttag_tag_pub_date_idx'),
+        ]
+
+
+class ImageBlob(models.Model):
+    """
+    Модель уникального файла картинки: одинаковые загрузки хранятся
+    один раз, а ref_count — число постов, которые на него ссылаются.
+    """
+    name = models.CharField(
+        verbose_name='Файл',
+        max_length=100,
+        unique=True,
+    )
+    ref_count = models.PositiveIntegerField(
+        verbose_name='Ссылок',
+        default=0,
+    )
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = 'Файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+
+class DeletionVersion(models.Model):
+    """
+    Счётчик удалений записей модели label: меняется в той же транзакции,
+    что и удаление, поэтому виден всем процессам.
+    """
+    label = models.CharField(
+        verbose_name='Модель',
+        max_length=100,
+        unique=True,
+    )
+    version = models.BigIntegerField(
+        verbose_name='Версия удалений',
+        default=0,
+    )
+
+    def __str__(self):
+        return f'{self.label}: {self.version}'
+
+    class Meta:
+        verbose_name = 'Версия удалений'
+        verbose_name_plural = 'Версии удалений'
+
+
+class SearchMatch(models.Lookup):
+    """Полнотекстовое условие FTS5: столбец MATCH выражение."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5-таблицы: поиск сразу по всем её столбцам."""
+
+
+SearchDocumentField.register_lookup(SearchMatch)
+
+
+class PostSearch(models.Model):
+    """
+    Полнотекстовый индекс FTS5 по текстам постов. Таблица и триггеры
+    синхронизации создаются миграцией, rank — оценка BM25 (чем меньше,
+    тем релевантнее), доступна только вместе с match.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search',
+    )
+    text = models.TextField()
+    document = SearchDocumentField(db_column='posts_postsearch')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_postsearch'
+
+
+class CommentSearch(models.Model):
+    """
+    Полнотекстовый индекс FTS5 по текстам комментариев: строка на
+    комментарий, к посту присоединяется через posts_comment.
+    """
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search',
+    )
+    text = models.TextField()
+    document = SearchDocumentField(db_column='posts_commentsearch')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_commentsearch'
@@ -0,0 +1,42 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Group
+
+NAV_GROUPS_KEY: str = 'nav_groups:{version}'
+NAV_VERSION_KEY: str = 'nav_groups:version'
+
+
+def bump_nav_groups_version():
+    """Объявляет устаревшим закэшированный список групп навигации."""
+    def bump():
+        cache.set(NAV_VERSION_KEY, uuid.uuid4().hex, None)
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_nav_groups():
+    """
+    Возвращает пару (группы, есть_ещё): не более GROUPS_NAV_SIZE самых
+    активных по числу постов групп и признак того, что групп больше.
+    """
+    version = cache.get(NAV_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(NAV_VERSION_KEY, version, None)
+    key = NAV_GROUPS_KEY.format(version=version)
+    nav_groups = cache.get(key)
+    if nav_groups is None:
+        size = settings.GROUPS_NAV_SIZE
+        groups = list(
+            Group.objects.annotate(activity=Count('posts'))
+            .order_by('-activity', 'title')
+            .only('title', 'slug')[:size + 1]
+        )
+        nav_groups = (groups[:size], len(groups) > size)
+        cache.set(key, nav_groups, settings.GROUPS_NAV_CACHE_TIMEOUT)
+    return nav_groups
@@ -0,0 +1,79 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.encoding import uri_to_iri
+
+PAGE_KEY: str = 'page_cache:{version}:{path}:{page}'
+GENERATION_KEY: str = 'page_cache:generation:{path}'
+GLOBAL_PATH: str = '*'
+
+
+def _path_hash(path):
+    return hashlib.md5(uri_to_iri(path).encode()).hexdigest()
+
+
+def _generation_key(path):
+    return GENERATION_KEY.format(path=_path_hash(path))
+
+
+def get_page_version(path):
+    """Версия кэша страниц по адресу path с учётом общей версии."""
+    keys = [_generation_key(GLOBAL_PATH), _generation_key(path)]
+    generations = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys
+               if key not in generations}
+    if missing:
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return '.'.join(generations[key] for key in keys)
+
+
+def _bump(keys):
+    def bump():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+    bump()
+    transaction.on_commit(bump)
+
+
+def purge_pages(*paths):
+    """Сбрасывает кэш всех страниц пагинации по указанным адресам."""
+    _bump([_generation_key(path) for path in paths])
+
+
+def purge_all_pages():
+    """Сбрасывает кэш всех страниц."""
+    _bump([_generation_key(GLOBAL_PATH)])
+
+
+def cache_anonymous_page(view):
+    """
+    Кэширует ответ функции-обработчика для анонимных GET-запросов
+    по адресу и номеру страницы. Запросы с другими параметрами
+    (например, курсорами пагинации) не кэшируются.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        params = set(request.GET) - {'page'}
+        if (request.method != 'GET' or params
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        key = PAGE_KEY.format(
+            version=get_page_version(request.path),
+            path=_path_hash(request.path),
+            page=request.GET.get('page', '1'),
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies:
+            cache.set(key, (response.content, response['Content-Type']),
+                      settings.PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,155 @@
+import base64
+import binascii
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Least
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import CommentSearch, Post, PostSearch
+from .utils import CursorPage, InvalidCursor
+
+SEARCH_TABLE: str = 'posts_postsearch'
+COMMENT_SEARCH_TABLE: str = 'posts_commentsearch'
+SEARCH_PARAM: str = 'q'
+MAX_TERMS: int = 8
+SNIPPET_TOKENS: int = 16
+SNIPPET_ELLIPSIS: str = '…'
+HIGHLIGHT_START: str = '\x02'
+HIGHLIGHT_END: str = '\x03'
+
+
+def build_match_query(query):
+    """
+    Превращает пользовательский запрос в выражение FTS5 MATCH:
+    каждое слово ищется как префикс, все слова обязательны.
+    Пустая строка означает, что искать нечего.
+    """
+    terms = re.findall(r'\w+', query.lower())[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def encode_search_cursor(post):
+    """Кодирует позицию найденного поста (ранг, id) в токен."""
+    raw = f'{post.search_rank!r}|{post.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_search_cursor(token):
+    """Раскодирует токен в пару (ранг, id)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        rank, pk = raw.rsplit('|', 1)
+        return float(rank), int(pk)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise InvalidCursor(token)
+
+
+def highlight(snippet):
+    """Экранирует фрагмент текста и выделяет в нём найденные слова."""
+    return mark_safe(escape(snippet)
+                     .replace(HIGHLIGHT_START, '<mark>')
+                     .replace(HIGHLIGHT_END, '</mark>'))
+
+
+class SearchPage(CursorPage):
+    """Страница результатов поиска с курсором ?after= по рангу."""
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return encode_search_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        return None
+
+
+def _ranked_hits_sql():
+    """
+    Запрос найденных постов с рангом и фрагментом: лучшая строка среди
+    текста поста и его комментариев. Параметры — четыре аргумента
+    snippet() и выражение MATCH, для поста и для комментариев.
+    """
+    snippet = 'snippet({table}, -1, %s, %s, %s, %s)'
+    return (
+        f'SELECT post_id, min(rank) AS rank, snippet FROM ('
+        f'SELECT rowid AS post_id, rank, '
+        f'{snippet.format(table=SEARCH_TABLE)} AS snippet '
+        f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+        f'UNION ALL '
+        f'SELECT comment.post_id, {COMMENT_SEARCH_TABLE}.rank, '
+        f'{snippet.format(table=COMMENT_SEARCH_TABLE)} '
+        f'FROM {COMMENT_SEARCH_TABLE} INNER JOIN posts_comment comment '
+        f'ON comment.id = {COMMENT_SEARCH_TABLE}.rowid '
+        f'WHERE {COMMENT_SEARCH_TABLE} MATCH %s'
+        f') GROUP BY post_id'
+    )
+
+
+def search_posts(query, per_page, after=None):
+    """
+    Ищет посты по тексту и комментариям, упорядочивая по BM25.
+    Найденным постам проставляются search_rank и search_snippet.
+    """
+    match = build_match_query(query)
+    if not match:
+        return SearchPage([], None, has_next=False, has_previous=False)
+    sql = f'SELECT post_id, rank, snippet FROM ({_ranked_hits_sql()})'
+    snippet_params = [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_ELLIPSIS,
+                      SNIPPET_TOKENS]
+    params = [*snippet_params, match, *snippet_params, match]
+    cursor_position = None
+    if after:
+        try:
+            cursor_position = decode_search_cursor(after)
+        except InvalidCursor:
+            pass
+    if cursor_position is not None:
+        rank, pk = cursor_position
+        sql += ' WHERE rank > %s OR (rank = %s AND post_id > %s)'
+        params += [rank, rank, pk]
+    sql += ' ORDER BY rank, post_id LIMIT %s'
+    params.append(per_page + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    posts = Post.objects.for_feed().in_bulk(
+        [post_id for post_id, _, _ in rows[:per_page]])
+    found = []
+    for post_id, rank, snippet in rows[:per_page]:
+        if post_id in posts:
+            post = posts[post_id]
+            post.search_rank = rank
+            post.search_snippet = highlight(snippet)
+            found.append(post)
+    return SearchPage(found, None, has_next=len(rows) > per_page,
+                      has_previous=cursor_position is not None)
+
+
+def filter_search(queryset, query):
+    """
+    Ограничивает выборку постов найденными по запросу и добавляет
+    аннотацию search_rank (чем меньше, тем релевантнее): лучший ранг
+    среди текста поста и его комментариев.
+    """
+    match = build_match_query(query)
+    if not match:
+        return queryset
+    post_hits = PostSearch.objects.filter(document__match=match)
+    comment_hits = CommentSearch.objects.filter(document__match=match)
+    post_rank = Subquery(post_hits.filter(
+        post=OuterRef('pk')).values('rank'), output_field=FloatField())
+    comment_rank = Subquery(comment_hits.filter(
+        comment__post=OuterRef('pk')).order_by().values(
+        'comment__post').annotate(best=Min('rank')).values('best'),
+        output_field=FloatField())
+    return queryset.filter(
+        Q(pk__in=post_hits.values('post_id'))
+        | Q(pk__in=comment_hits.values('comment__post_id'))
+    ).annotate(search_rank=Least(Coalesce(post_rank, comment_rank),
+                                 Coalesce(comment_rank, post_rank)))
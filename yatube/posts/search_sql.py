@@ -0,0 +1,153 @@
+from django.db import migrations
+
+# Первая версия индекса (миграция 0013): комментарии поста склеены
+# в столбец comments его строки и пересобираются при каждой записи.
+COMMENTS_TEXT: str = (
+    "(SELECT coalesce(group_concat(text, ' '), '') "
+    "FROM posts_comment WHERE post_id = {post})"
+)
+
+CREATE_TABLE_SQL: list = [
+    "CREATE VIRTUAL TABLE posts_postsearch USING fts5("
+    "text, comments, tokenize='unicode61 remove_diacritics 2', "
+    "prefix='2 3')",
+    "INSERT INTO posts_postsearch(posts_postsearch, rank) "
+    "VALUES ('rank', 'bm25(4.0, 1.0)')",
+    "INSERT INTO posts_postsearch(rowid, text, comments) "
+    "SELECT id, text, {} FROM posts_post".format(
+        COMMENTS_TEXT.format(post='posts_post.id')),
+]
+
+CREATE_TRIGGERS_SQL: list = [
+    "CREATE TRIGGER posts_postsearch_post_insert "
+    "AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_postsearch(rowid, text, comments) "
+    "VALUES (new.id, new.text, ''); END",
+    "CREATE TRIGGER posts_postsearch_post_update "
+    "AFTER UPDATE OF text ON posts_post BEGIN "
+    "UPDATE posts_postsearch SET text = new.text "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER posts_postsearch_post_delete "
+    "AFTER DELETE ON posts_post BEGIN "
+    "DELETE FROM posts_postsearch WHERE rowid = old.id; END",
+    "CREATE TRIGGER posts_postsearch_comment_insert "
+    "AFTER INSERT ON posts_comment BEGIN "
+    "UPDATE posts_postsearch SET comments = {} "
+    "WHERE rowid = new.post_id; END".format(
+        COMMENTS_TEXT.format(post='new.post_id')),
+    "CREATE TRIGGER posts_postsearch_comment_update "
+    "AFTER UPDATE OF text, post_id ON posts_comment BEGIN "
+    "UPDATE posts_postsearch SET comments = {} "
+    "WHERE rowid = old.post_id; "
+    "UPDATE posts_postsearch SET comments = {} "
+    "WHERE rowid = new.post_id; END".format(
+        COMMENTS_TEXT.format(post='old.post_id'),
+        COMMENTS_TEXT.format(post='new.post_id')),
+    "CREATE TRIGGER posts_postsearch_comment_delete "
+    "AFTER DELETE ON posts_comment BEGIN "
+    "UPDATE posts_postsearch SET comments = {} "
+    "WHERE rowid = old.post_id; END".format(
+        COMMENTS_TEXT.format(post='old.post_id')),
+]
+
+DROP_TRIGGERS_SQL: list = [
+    "DROP TRIGGER IF EXISTS posts_postsearch_comment_delete",
+    "DROP TRIGGER IF EXISTS posts_postsearch_comment_update",
+    "DROP TRIGGER IF EXISTS posts_postsearch_comment_insert",
+    "DROP TRIGGER IF EXISTS posts_postsearch_post_delete",
+    "DROP TRIGGER IF EXISTS posts_postsearch_post_update",
+    "DROP TRIGGER IF EXISTS posts_postsearch_post_insert",
+]
+
+DROP_TABLE_SQL: list = [
+    "DROP TABLE IF EXISTS posts_postsearch",
+]
+
+# Текущая версия (миграция 0021): каждый комментарий — отдельная строка
+# posts_commentsearch с rowid комментария, к постам комментарии
+# присоединяются при поиске, поэтому запись комментария стоит
+# одной строки индекса, а не пересборки всех комментариев поста.
+CREATE_SPLIT_TABLES_SQL: list = [
+    "CREATE VIRTUAL TABLE posts_postsearch USING fts5("
+    "text, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO posts_postsearch(posts_postsearch, rank) "
+    "VALUES ('rank', 'bm25(4.0)')",
+    "INSERT INTO posts_postsearch(rowid, text) "
+    "SELECT id, text FROM posts_post",
+    "CREATE VIRTUAL TABLE posts_commentsearch USING fts5("
+    "text, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO posts_commentsearch(rowid, text) "
+    "SELECT id, text FROM posts_comment",
+]
+
+CREATE_SPLIT_TRIGGERS_SQL: list = [
+    "CREATE TRIGGER posts_postsearch_post_insert "
+    "AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_postsearch(rowid, text) "
+    "VALUES (new.id, new.text); END",
+    "CREATE TRIGGER posts_postsearch_post_update "
+    "AFTER UPDATE OF text ON posts_post BEGIN "
+    "UPDATE posts_postsearch SET text = new.text "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER posts_postsearch_post_delete "
+    "AFTER DELETE ON posts_post BEGIN "
+    "DELETE FROM posts_postsearch WHERE rowid = old.id; END",
+    "CREATE TRIGGER posts_commentsearch_insert "
+    "AFTER INSERT ON posts_comment BEGIN "
+    "INSERT INTO posts_commentsearch(rowid, text) "
+    "VALUES (new.id, new.text); END",
+    "CREATE TRIGGER posts_commentsearch_update "
+    "AFTER UPDATE OF text ON posts_comment BEGIN "
+    "UPDATE posts_commentsearch SET text = new.text "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER posts_commentsearch_delete "
+    "AFTER DELETE ON posts_comment BEGIN "
+    "DELETE FROM posts_commentsearch WHERE rowid = old.id; END",
+]
+
+DROP_SPLIT_TRIGGERS_SQL: list = [
+    "DROP TRIGGER IF EXISTS posts_commentsearch_delete",
+    "DROP TRIGGER IF EXISTS posts_commentsearch_update",
+    "DROP TRIGGER IF EXISTS posts_commentsearch_insert",
+    "DROP TRIGGER IF EXISTS posts_postsearch_post_delete",
+    "DROP TRIGGER IF EXISTS posts_postsearch_post_update",
+    "DROP TRIGGER IF EXISTS posts_postsearch_post_insert",
+]
+
+DROP_SPLIT_TABLES_SQL: list = [
+    "DROP TABLE IF EXISTS posts_commentsearch",
+    "DROP TABLE IF EXISTS posts_postsearch",
+]
+
+SEARCH_TRIGGERS_SQL: str = (
+    "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+    "AND tbl_name IN ('posts_post', 'posts_comment') "
+    "AND name LIKE 'posts_%search_%'"
+)
+
+
+def preserve_search_triggers(*operations):
+    """
+    Операции миграции, после которых триггеры полнотекстового индекса
+    создаются заново. SQLite пересоздаёт таблицу при изменении её
+    столбцов, и триггеры posts_post и posts_comment при этом теряются.
+    Восстанавливаются те триггеры, что были до операций, — той версии
+    индекса, на которой стоит база.
+    """
+    saved = []
+
+    def save(apps, schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(SEARCH_TRIGGERS_SQL)
+            saved[:] = cursor.fetchall()
+
+    def restore(apps, schema_editor):
+        for name, sql in saved:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            schema_editor.execute(sql)
+
+    return [
+        migrations.RunPython(save, restore),
+        *operations,
+        migrations.RunPython(restore, save),
+    ]
@@ -0,0 +1,280 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+
+from .blobs import acquire_blob, release_blob
+from .cards import bump_card_version
+from .counters import bump_counter
+from .deletions import bump_deletion_version
+from .hashtags import sync_post_tags
+from .models import Comment, Follow, Group, Post, User, UserCounters
+from .navigation import bump_nav_groups_version
+from .page_cache import purge_all_pages, purge_pages
+from .thumbnails import queue_post_thumbnail, read_image_info
+from .timeline import (backfill_timeline, fan_out_post, promote_celebrity,
+                       prune_timeline)
+from .usernames import get_username_key
+
+RENDERED_USER_FIELDS: frozenset = frozenset(
+    {'username', 'first_name', 'last_name'})
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance, created, raw=False,
+                         update_fields=None, **kwargs):
+    """
+    Создаёт строку счётчиков для нового пользователя и обновляет в ней
+    ключ поиска при смене имени.
+    """
+    if raw:
+        return
+    username_key = get_username_key(instance.username)
+    if created:
+        UserCounters.objects.get_or_create(
+            user=instance, defaults={'username_key': username_key})
+    elif update_fields is None or 'username' in update_fields:
+        UserCounters.objects.filter(user=instance).exclude(
+            username_key=username_key).update(username_key=username_key)
+
+
+@receiver(post_save, sender=Post)
+def deliver_post_to_timelines(sender, instance, created, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков."""
+    if created:
+        bump_counter(instance.author_id, 'posts_count', 1)
+        fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def decrease_posts_count(sender, instance, **kwargs):
+    """Уменьшает счётчик постов автора."""
+    bump_counter(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def increase_comments_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик комментариев автора."""
+    if created:
+        bump_counter(instance.author_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comments_count(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев автора."""
+    bump_counter(instance.author_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def fill_timeline_on_follow(sender, instance, created, **kwargs):
+    """Заполняет ленту постами автора при оформлении подписки."""
+    if created:
+        bump_counter(instance.author_id, 'followers_count', 1)
+        bump_counter(instance.user_id, 'following_count', 1)
+        promote_celebrity(instance.author_id)
+        backfill_timeline(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline_on_unfollow(sender, instance, **kwargs):
+    """Очищает ленту от постов автора при отмене подписки."""
+    bump_counter(instance.author_id, 'followers_count', -1)
+    bump_counter(instance.user_id, 'following_count', -1)
+    prune_timeline(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Group)
+def remember_deletion(sender, **kwargs):
+    """Меняет версию удалений модели для валидаторов списков API."""
+    bump_deletion_version(sender)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_card(sender, instance, **kwargs):
+    """Сбрасывает кэш карточки изменённого поста."""
+    bump_card_version('post', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def expire_commented_post_card(sender, instance, **kwargs):
+    """Сбрасывает кэш карточки поста, у которого изменились комментарии."""
+    bump_card_version('post', instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def expire_group_cards(sender, instance, **kwargs):
+    """Сбрасывает кэш карточек постов изменённой группы."""
+    bump_card_version('group', instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def expire_author_cards(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает кэш карточек постов изменённого пользователя."""
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_card_version('user', instance.pk)
+
+
+def get_post_pages(post, *group_ids):
+    """Адреса страниц, на которых выводится пост."""
+    paths = [
+        reverse('posts:main'),
+        reverse('posts:profile', kwargs={'username': post.author.username}),
+    ]
+    paths += [group.get_absolute_url()
+              for group in Group.objects.filter(id__in=group_ids)]
+    return paths
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает прежние группу и текст редактируемого поста и сбрасывает
+    миниатюру, если картинку заменили.
+    """
+    if instance.pk and not raw:
+        previous = (Post.objects.filter(pk=instance.pk)
+                    .values('group_id', 'text', 'image').first() or {})
+        instance._previous_group_id = previous.get('group_id')
+        instance._previous_text = previous.get('text')
+        instance._previous_image = previous.get('image', '')
+        if previous.get('image', '') != instance.image.name:
+            instance.thumbnail = ''
+            instance.image_variants = ''
+
+
+@receiver(pre_save, sender=Post)
+def store_image_info(sender, instance, raw=False, **kwargs):
+    """
+    Сохраняет размеры и вес только что загруженной картинки поста,
+    чтобы при выводе не обращаться к файлу.
+    """
+    if raw:
+        return
+    if not instance.image:
+        instance.image_width = instance.image_height = None
+        instance.image_size = None
+        instance.image_color = instance.image_placeholder = ''
+    elif not instance.image._committed:
+        for field, value in read_image_info(instance.image).items():
+            setattr(instance, field, value)
+        instance.image_color = instance.image_placeholder = ''
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, raw=False, **kwargs):
+    """Переносит ссылку поста со старого файла картинки на новый."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_image', '')
+    current = instance.image.name or ''
+    if previous == current:
+        return
+    if current:
+        acquire_blob(current)
+    if previous:
+        release_blob(previous)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    """Освобождает файл картинки удалённого поста."""
+    if instance.image:
+        release_blob(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def prepare_post_thumbnail(sender, instance, raw=False, **kwargs):
+    """Ставит в очередь подготовку миниатюры новой картинки поста."""
+    if not raw and instance.image and not instance.thumbnail:
+        queue_post_thumbnail(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def update_post_tags(sender, instance, created, raw=False, **kwargs):
+    """Обновляет хэштеги поста, если его текст изменился."""
+    if raw:
+        return
+    if created or instance.text != getattr(instance, '_previous_text', None):
+        sync_post_tags(instance, created)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц, на которых выводится пост."""
+    group_ids = {instance.group_id,
+                 getattr(instance, '_previous_group_id', None)}
+    purge_pages(*get_post_pages(instance, *group_ids - {None}))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_commented_post_pages(sender, instance, created=True, **kwargs):
+    """Сбрасывает кэш страниц с прокомментированным постом."""
+    if not created:
+        return
+    post = (Post.objects.select_related('author')
+            .filter(pk=instance.post_id).first())
+    if post is not None:
+        purge_pages(*get_post_pages(post, post.group_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def purge_pages_on_group_change(sender, instance, **kwargs):
+    """Сбрасывает кэш всех страниц и навигации при изменении группы."""
+    purge_all_pages()
+    bump_nav_groups_version()
+
+
+@receiver(pre_save, sender=User)
+def remember_rendered_user_fields(sender, instance, raw=False,
+                                  update_fields=None, **kwargs):
+    """Запоминает выводимые на страницах поля изменяемого пользователя."""
+    if raw or not instance.pk:
+        return
+    fields = RENDERED_USER_FIELDS
+    if update_fields is not None:
+        fields = fields & set(update_fields)
+    instance._previous_rendered = (
+        User.objects.filter(pk=instance.pk).values(*fields).first()
+        if fields else {})
+
+
+@receiver(post_save, sender=User)
+def purge_pages_on_user_change(sender, instance, created, **kwargs):
+    """
+    Сбрасывает кэш страниц, если у пользователя изменилось имя или
+    другое выводимое на них поле.
+    """
+    if created:
+        purge_pages(reverse('posts:profile',
+                            kwargs={'username': instance.username}))
+        return
+    previous = getattr(instance, '_previous_rendered', None)
+    if previous is None or any(getattr(instance, field) != value
+                               for field, value in previous.items()):
+        purge_all_pages()
+
+
+@receiver(post_save, sender=User)
+def touch_authored_on_rename(sender, instance, created, **kwargs):
+    """
+    Сдвигает отметку изменения постов и комментариев пользователя,
+    сменившего имя: оно выводится в них в API, и валидаторы условных
+    запросов должны устареть.
+    """
+    previous = getattr(instance, '_previous_rendered', None) or {}
+    if created or previous.get('username', instance.username) == (
+            instance.username):
+        return
+    now = timezone.now()
+    Post.objects.filter(author=instance).update(updated=now)
+    Comment.objects.filter(author=instance).update(updated=now)
@@ -0,0 +1,35 @@
+import hashlib
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, раскладывающее файлы по SHA-256 их содержимого: одинаковые
+    загрузки сохраняются один раз и получают одно и то же имя.
+    """
+
+    def get_digest_name(self, name, content):
+        """Имя файла по хэшу содержимого, посчитанному по частям."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, hexdigest[:2], hexdigest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_digest_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+post_image_storage = ContentAddressedStorage()
@@ -0,0 +1,115 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Comment, Follow, Post, PostTag, Timeline, UserCounters
+
+User = get_user_model()
+URL: str = '/api/v1/posts/bulk/'
+
+
+class ApiBulkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        cls.other = User.objects.create(username='Читатель')
+        Follow.objects.create(user=cls.other, author=cls.author)
+        cls.foreign = Post.objects.create(text='Чужой', author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        token = AccessToken.for_user(self.author)
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def send(self, method, data, url=URL):
+        return getattr(self.client, method)(
+            url, json.dumps(data), content_type='application/json')
+
+    def posts_count(self, user):
+        return UserCounters.objects.get(user=user).posts_count
+
+    def test_bulk_create_runs_side_effects(self):
+        """Пакет постов создаётся целиком со счётчиками, лентами и тегами."""
+        response = self.send('post', [{'text': f'#рок №{i}'}
+                                      for i in range(3)])
+        self.assertEqual(response.status_code, 201)
+        ids = [item['id'] for item in response.json()]
+        self.assertEqual(
+            list(Post.objects.filter(author=self.author)
+                 .order_by('id').values_list('id', flat=True)), ids)
+        self.assertEqual(self.posts_count(self.author), 3)
+        self.assertEqual(PostTag.objects.filter(post_id__in=ids).count(), 3)
+        self.assertEqual(
+            Timeline.objects.filter(user=self.other).count(), 3)
+
+    def test_bulk_create_reports_item_errors(self):
+        """При ошибке в одном объекте пакет не создаётся."""
+        response = self.send('post', [{'text': 'Верно'}, {'text': ''}])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('text', errors[1])
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+
+    def test_bulk_update(self):
+        """Свои посты правятся пакетом, теги и отметки обновляются."""
+        posts = [Post.objects.create(text='#рок', author=self.author)
+                 for _ in range(2)]
+        updated = posts[0].updated
+        response = self.send('patch', [{'id': post.pk, 'text': '#джаз'}
+                                       for post in posts])
+        self.assertEqual(response.status_code, 200)
+        posts[0].refresh_from_db()
+        self.assertEqual(posts[0].text, '#джаз')
+        self.assertGreater(posts[0].updated, updated)
+        self.assertEqual(set(PostTag.objects.values_list(
+            'tag__name', flat=True)), {'джаз'})
+
+    def test_bulk_update_checks_each_object(self):
+        """Пакет с чужим или несуществующим постом отклоняется."""
+        own = Post.objects.create(text='Свой', author=self.author)
+        response = self.send('patch', [{'id': own.pk, 'text': 'Правка'},
+                                       {'id': self.foreign.pk, 'text': 'X'}])
+        self.assertEqual(response.status_code, 403)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('detail', errors[1])
+        response = self.send('patch', [{'id': 0, 'text': 'X'}, {}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()), 2)
+        own.refresh_from_db()
+        self.assertEqual(own.text, 'Свой')
+
+    def test_bulk_delete(self):
+        """Свои посты удаляются пакетом, счётчик автора уменьшается."""
+        posts = [Post.objects.create(text='Пост', author=self.author)
+                 for _ in range(3)]
+        response = self.send('delete', [post.pk for post in posts[:2]])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Post.objects.filter(author=self.author)),
+                         [posts[2]])
+        self.assertEqual(self.posts_count(self.author), 1)
+        response = self.send('delete', [self.foreign.pk])
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_comments(self):
+        """Комментарии создаются пакетом к посту из адреса."""
+        url = f'/api/v1/posts/{self.foreign.pk}/comments/bulk/'
+        response = self.send('post', [{'text': 'Раз'}, {'text': 'Два'}],
+                             url=url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Comment.objects.filter(post=self.foreign).count(),
+                         2)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).comments_count, 2)
+
+    def test_bulk_requires_list(self):
+        """Пакет должен быть списком ограниченного размера."""
+        response = self.send('post', {'text': 'Один'})
+        self.assertEqual(response.status_code, 400)
+        with self.settings(API_BULK_MAX_SIZE=1):
+            response = self.send('post', [{'text': 'Раз'}, {'text': 'Два'}])
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,123 @@
+import gzip
+import json
+from decimal import Decimal
+from unittest import mock
+
+from api import renderers
+from api.middleware import accepts_gzip
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Post
+
+User = get_user_model()
+URL: str = '/api/v1/posts/'
+
+
+class FastJSONRendererTest(TestCase):
+    def test_same_bytes_as_drf(self):
+        """Вывод совпадает с JSONRenderer DRF побайтно."""
+        data = [{
+            'text': 'Привет мир  "кавычки" \\',
+            'pub_date': timezone.now(),
+            'price': Decimal('1.5'),
+            'error': gettext_lazy('Ошибка'),
+            'pair': (1, 2),
+            'big': 2 ** 70,
+            'none': None,
+        }]
+        expected = JSONRenderer().render(data)
+        self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(data),
+                             expected)
+
+    def test_indent_uses_drf(self):
+        """С отступами вывод строит стандартный json."""
+        data = {'id': 1}
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type))
+
+
+@override_settings(API_GZIP_MIN_SIZE=512)
+class ApiCompressionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        cls.post = Post.objects.create(text='Гитара ' * 200,
+                                       author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        token = AccessToken.for_user(self.author)
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_accepts_gzip(self):
+        """Разбор Accept-Encoding учитывает q и '*'."""
+        cases = {
+            'gzip, deflate, br': True,
+            'br;q=1.0, gzip;q=0.5': True,
+            'gzip;q=0': False,
+            '*': True,
+            '*;q=0.1, gzip;q=0': False,
+            'identity': False,
+            '': False,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertIs(accepts_gzip(header), expected)
+
+    def test_large_response_compressed(self):
+        """Большой ответ сжимается, если клиент принимает gzip."""
+        plain = self.client.get(URL)
+        response = self.client.get(URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(response['ETag'],
+                         plain['ETag'][:-1] + '-gzip"')
+
+    def test_small_or_refused_not_compressed(self):
+        """Малые ответы и отказ от gzip отдаются без сжатия."""
+        cases = (
+            (f'{URL}?fields=id', 'gzip'),
+            (URL, 'gzip;q=0, identity'),
+        )
+        for url, accept_encoding in cases:
+            with self.subTest(url=url, accept_encoding=accept_encoding):
+                response = self.client.get(
+                    url, HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                json.loads(response.content)
+
+    def test_not_api_untouched(self):
+        """Страницы сайта этим middleware не сжимаются."""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_conditional_requests_with_gzip_etag(self):
+        """ETag сжатого ответа работает в If-None-Match и If-Match."""
+        url = f'{URL}{self.post.pk}/'
+        etag = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertTrue(etag.endswith('-gzip"'))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.patch(
+            url, json.dumps({'text': 'Бас ' * 200}),
+            content_type='application/json', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(
+            url, json.dumps({'text': 'Барабаны'}),
+            content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
@@ -0,0 +1,124 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ApiConditionalRequestTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        cls.group = Group.objects.create(title='Гитаристы', slug='guitar',
+                                         description='Про гитары')
+        cls.post = Post.objects.create(text='Гитара', author=cls.author)
+        cls.comment = Comment.objects.create(text='Отлично',
+                                             author=cls.author, post=cls.post)
+
+    def setUp(self):
+        cache.clear()
+        token = AccessToken.for_user(self.author)
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def assert_not_modified(self, url):
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_lists_and_details_not_modified(self):
+        """Повторный запрос с If-None-Match получает 304."""
+        for url in ('/api/v1/posts/', '/api/v1/groups/',
+                    f'/api/v1/posts/{self.post.pk}/',
+                    f'/api/v1/groups/{self.group.pk}/',
+                    f'/api/v1/posts/{self.post.pk}/comments/'):
+            with self.subTest(url=url):
+                self.assert_not_modified(url)
+
+    def test_not_modified_without_serializing(self):
+        """Ответ 304 на список отдаётся без выборки постов."""
+        etag = self.client.get('/api/v1/posts/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/posts/',
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('"posts_post"."text"' in query['sql']
+                             for query in queries.captured_queries))
+
+    def test_detail_if_modified_since(self):
+        """Объект без изменений с If-Modified-Since получает 304."""
+        url = f'/api/v1/posts/{self.post.pk}/'
+        modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_changes(self):
+        """ETag списка меняется при добавлении, правке и удалении."""
+        url = '/api/v1/posts/'
+        etag = self.assert_not_modified(url)
+        other = Post.objects.create(text='Бас', author=self.author)
+        etag = self.assert_changed(url, etag)
+        self.post.text = 'Гитара Les Paul'
+        self.post.save()
+        etag = self.assert_changed(url, etag)
+        other.delete()
+        self.assert_changed(url, etag)
+
+    def test_deletion_version_survives_cache(self):
+        """Версия удалений хранится в базе, а не в кэше процесса."""
+        url = '/api/v1/posts/'
+        etag = self.client.get(url)['ETag']
+        cache.clear()
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+        Post.objects.create(text='Бас', author=self.author).delete()
+        cache.clear()
+        self.assert_changed(url, etag)
+
+    def test_author_rename_changes_etags(self):
+        """Смена имени автора меняет ETag его постов и комментариев."""
+        urls = ('/api/v1/posts/', f'/api/v1/posts/{self.post.pk}/',
+                f'/api/v1/posts/{self.post.pk}/comments/',
+                f'/api/v1/posts/{self.post.pk}/comments/{self.comment.pk}/')
+        etags = {url: self.assert_not_modified(url) for url in urls}
+        self.author.first_name = 'Лев'
+        self.author.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+        self.author.username = 'Прозаик'
+        self.author.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                self.assert_changed(url, etag)
+                self.assertContains(self.client.get(url), 'Прозаик')
+
+    def assert_changed(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_if_match_protects_updates(self):
+        """Правка с устаревшим If-Match отклоняется с кодом 412."""
+        for url in (f'/api/v1/posts/{self.post.pk}/',
+                    f'/api/v1/posts/{self.post.pk}/comments/'
+                    f'{self.comment.pk}/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.patch(
+                    url, json.dumps({'text': 'Первая правка'}),
+                    content_type='application/json', HTTP_IF_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                response = self.client.patch(
+                    url, json.dumps({'text': 'Вторая правка'}),
+                    content_type='application/json', HTTP_IF_MATCH=etag)
+                self.assertEqual(response.status_code, 412)
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import Comment, Post
+
+User = get_user_model()
+POSTS_COUNT: int = 5
+
+
+class ApiCursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        Post.objects.bulk_create(
+            Post(text=f'Гитара №{i}', author=cls.author)
+            for i in range(POSTS_COUNT))
+        Post.objects.update(pub_date=timezone.now())
+        cls.post = Post.objects.order_by('id').first()
+
+    def setUp(self):
+        self.client = Client()
+
+    def collect(self, url, data=None):
+        """Проходит все страницы по ссылкам next и собирает id."""
+        response = self.client.get(url, data)
+        ids = []
+        while True:
+            page = response.json()
+            self.assertNotIn('count', page)
+            ids += [item['id'] for item in page['results']]
+            if not page['next']:
+                return ids
+            response = self.client.get(page['next'])
+
+    def test_posts_paged_by_cursor_without_count(self):
+        """Посты листаются курсором без COUNT-запроса."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v1/posts/', {'limit': 2})
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries.captured_queries))
+        ids = self.collect('/api/v1/posts/', {'limit': 2})
+        self.assertEqual(ids, sorted(Post.objects.values_list(
+            'id', flat=True)))
+
+    def test_equal_dates_paged_stably(self):
+        """Посты с одинаковой датой не теряются и не повторяются."""
+        ids = self.collect('/api/v1/posts/',
+                           {'limit': 2, 'ordering': '-pub_date'})
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), POSTS_COUNT)
+
+    def test_ordering_restricted_to_indexed_fields(self):
+        """Сортировка по неиндексированному полю не применяется."""
+        ids = self.collect('/api/v1/posts/', {'ordering': 'text'})
+        self.assertEqual(ids, sorted(ids))
+
+    def test_offset_mode_kept(self):
+        """Пагинация limit/offset доступна по флагу и параметру offset."""
+        for params in ({'offset': 2, 'limit': 2},
+                       {'pagination': 'offset', 'limit': 2}):
+            with self.subTest(params=params):
+                page = self.client.get('/api/v1/posts/', params).json()
+                self.assertEqual(page['count'], POSTS_COUNT)
+                self.assertEqual(len(page['results']), 2)
+
+    def test_comments_paged_in_order(self):
+        """Комментарии листаются курсором от старых к новым."""
+        comments = [Comment.objects.create(text=f'Отзыв №{i}',
+                                           author=self.author,
+                                           post=self.post)
+                    for i in range(3)]
+        ids = self.collect(f'/api/v1/posts/{self.post.pk}/comments/',
+                           {'limit': 2})
+        self.assertEqual(ids, [comment.pk for comment in comments])
+
+    def test_search_paged_by_rank(self):
+        """Результаты поиска листаются курсором в порядке релевантности."""
+        ids = self.collect('/api/v1/posts/',
+                           {'search': 'гитара', 'limit': 2})
+        self.assertEqual(len(set(ids)), POSTS_COUNT)
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+URL: str = '/api/v1/posts/'
+POSTS_CNT: int = 5
+
+
+class ApiSparseFieldsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        cls.group = Group.objects.create(title='Гитаристы', slug='guitar',
+                                         description='Про гитары')
+        cls.posts = [Post.objects.create(text=f'Пост №{i}', author=cls.author,
+                                         group=cls.group)
+                     for i in range(POSTS_CNT)]
+        for post in cls.posts:
+            for text in ('Раз', 'Два'):
+                Comment.objects.create(text=text, author=cls.author,
+                                       post=post)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url=URL, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries.captured_queries
+
+    def test_fields_trim_response_and_columns(self):
+        """?fields= оставляет только нужные поля и столбцы."""
+        response, queries = self.get(fields='id,author')
+        results = response.json()['results']
+        self.assertEqual(len(results), POSTS_CNT)
+        self.assertEqual(results[0], {'id': self.posts[0].pk,
+                                      'author': self.author.username})
+        select = next(query['sql'] for query in queries
+                      if 'FROM "posts_post"' in query['sql']
+                      and 'MAX(' not in query['sql'])
+        self.assertNotIn('"posts_post"."text"', select)
+        self.assertNotIn('"auth_user"."password"', select)
+
+    def test_include_embeds_related(self):
+        """?include= встраивает комментарии и группу без N+1."""
+        response, queries = self.get(include='comments,group',
+                                     fields='id,image_variants')
+        post = response.json()['results'][0]
+        self.assertEqual(post['group']['slug'], self.group.slug)
+        self.assertEqual([comment['text'] for comment in post['comments']],
+                         ['Раз', 'Два'])
+        self.assertEqual(post['image_variants'], [])
+        self.assertIsNone(post['comments_next'])
+        _, few = self.get(include='comments,group', limit=1)
+        self.assertEqual(len(queries), len(few))
+
+    def test_detail_and_tag_feed(self):
+        """Выбор полей работает для поста, комментариев и ленты тега."""
+        response, _ = self.get(f'{URL}{self.posts[0].pk}/',
+                               fields='text', include='comments')
+        self.assertEqual(set(response.json()),
+                         {'text', 'comments', 'comments_next'})
+        response, _ = self.get(f'{URL}{self.posts[0].pk}/comments/',
+                               fields='text')
+        self.assertEqual(response.json()['results'][0], {'text': 'Раз'})
+        Post.objects.create(text='#рок', author=self.author)
+        response, _ = self.get('/api/v1/tags/рок/posts/', fields='text')
+        self.assertEqual(response.json()['results'], [{'text': '#рок'}])
+
+    @override_settings(API_INCLUDE_SIZE=2)
+    def test_include_caps_comments(self):
+        """
+        Встраиваются только последние комментарии, comments_next ведёт
+        к более ранним, в том числе с той же отметкой created.
+        """
+        post = self.posts[0]
+        for text in ('Три', 'Четыре', 'Пять'):
+            Comment.objects.create(text=text, author=self.author, post=post)
+        created = post.comments.get(text='Три').created
+        post.comments.filter(text__in=('Два', 'Четыре')).update(
+            created=created)
+        response, _ = self.get(f'{URL}{post.pk}/', include='comments')
+        data = response.json()
+        self.assertEqual([comment['text'] for comment in data['comments']],
+                         ['Четыре', 'Пять'])
+        texts = []
+        url = f'{data["comments_next"]}&limit=2'
+        while url:
+            page = self.get(url)[0].json()
+            texts[:0] = [comment['text'] for comment in page['results']]
+            url = page['previous']
+        self.assertEqual(texts, ['Раз', 'Два', 'Три'])
+        response, _ = self.get(include='comments')
+        self.assertEqual(
+            [len(post['comments']) for post in response.json()['results']],
+            [2] * POSTS_CNT)
+
+    def test_unknown_names(self):
+        """Неизвестные и пустые поля и связи отклоняются."""
+        for params in ({'fields': 'id,secret'}, {'include': 'author'},
+                       {'fields': ''}, {'fields': ' , '}):
+            with self.subTest(params=params):
+                response = self.client.get(URL, params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_etag_follows_embedded_objects(self):
+        """ETag зависит от выбранных полей и встроенных комментариев."""
+        etag = self.client.get(URL, {'include': 'comments'})['ETag']
+        self.assertNotEqual(etag, self.client.get(URL)['ETag'])
+        Comment.objects.create(text='Три', author=self.author,
+                               post=self.posts[0])
+        response = self.client.get(URL, {'include': 'comments'},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
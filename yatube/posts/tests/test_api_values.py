@@ -0,0 +1,102 @@
+import json
+from datetime import datetime, timezone
+from unittest import mock
+
+from api.values import serialize_rows
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+VARIANTS: list = [
+    {'name': 'posts/variants/ab/photo-480.webp', 'width': 480,
+     'format': 'webp'},
+    {'name': 'posts/variants/ab/photo-480.jpg', 'width': 480,
+     'format': 'jpeg'},
+]
+
+
+class ApiValuesListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        cls.group = Group.objects.create(title='Гитаристы', slug='guitar',
+                                         description='Про гитары')
+        cls.post = Post.objects.create(text='С картинкой', author=cls.author,
+                                       group=cls.group)
+        Post.objects.filter(pk=cls.post.pk).update(
+            image='posts/ab/photo.png', image_width=640, image_height=480,
+            image_color='#ff0000', image_variants=json.dumps(VARIANTS))
+        for i in range(3):
+            Post.objects.create(text=f'Пост №{i}', author=cls.author)
+            Comment.objects.create(text=f'Ответ №{i}', author=cls.author,
+                                   post=cls.post)
+        Comment.objects.filter(text='Ответ №0').update(
+            created=datetime(2022, 7, 14, 22, 58, tzinfo=timezone.utc))
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_same_as_serializer(self, url, params=None):
+        with mock.patch('api.values.serialize_rows',
+                        wraps=serialize_rows) as rows:
+            fast = self.client.get(url, params)
+        rows.assert_called_once()
+        with mock.patch('api.values.get_row_readers', return_value=None):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_lists_match_serializers(self):
+        """Быстрый список совпадает с выводом сериализатора побайтно."""
+        cases = (
+            ('/api/v1/posts/', None),
+            ('/api/v1/posts/', {'limit': 2, 'ordering': '-pub_date'}),
+            ('/api/v1/posts/', {'pagination': 'offset', 'limit': 2}),
+            ('/api/v1/posts/', {'fields': 'id,author,image_variants'}),
+            ('/api/v1/groups/', None),
+            (f'/api/v1/posts/{self.post.pk}/comments/', None),
+        )
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                self.assert_same_as_serializer(url, params)
+
+    def test_next_page_matches(self):
+        """Курсор следующей страницы тот же, что у сериализатора."""
+        response = self.assert_same_as_serializer('/api/v1/posts/',
+                                                  {'limit': 2})
+        self.assert_same_as_serializer(response.json()['next'])
+
+    def test_image_fields(self):
+        """Картинка и её варианты отдаются полными адресами."""
+        response = self.client.get('/api/v1/posts/', {'limit': 1})
+        post = response.json()['results'][0]
+        self.assertEqual(post['image'],
+                         'http://testserver/media/posts/ab/photo.png')
+        self.assertEqual(
+            [variant['url'] for variant in post['image_variants']],
+            [f'http://testserver/media/{variant["name"]}'
+             for variant in VARIANTS])
+        self.assertEqual(post['image_width'], 640)
+
+    def test_include_uses_serializer(self):
+        """Со встроенными объектами список строится сериализатором."""
+        response = self.client.get('/api/v1/posts/', {'include': 'group'})
+        self.assertEqual(response.json()['results'][0]['group']['slug'],
+                         self.group.slug)
+
+    def test_updated_not_exposed(self):
+        """Служебная отметка updated не попадает в вывод API."""
+        cases = (
+            ('/api/v1/groups/', {'id', 'title', 'slug', 'description'}),
+            (f'/api/v1/posts/{self.post.pk}/comments/',
+             {'id', 'post', 'author', 'text', 'created'}),
+        )
+        for url, fields in cases:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                items = data['results'] if 'results' in data else data
+                self.assertEqual(set(items[0]), fields)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+class UserCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Счетовод')
+        cls.reader = User.objects.create(username='Читатель')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_counters_follow_create_and_delete(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(text='Комментарий', post=post,
+                                         author=self.reader)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        author_counters = self.counters(self.author)
+        reader_counters = self.counters(self.reader)
+        self.assertEqual(author_counters.posts_count, 1)
+        self.assertEqual(author_counters.followers_count, 1)
+        self.assertEqual(reader_counters.comments_count, 1)
+        self.assertEqual(reader_counters.following_count, 1)
+
+        follow.delete()
+        comment.delete()
+        post.delete()
+        for user in (self.author, self.reader):
+            counters = self.counters(user)
+            with self.subTest(user=user):
+                self.assertEqual(
+                    (counters.posts_count, counters.comments_count,
+                     counters.followers_count, counters.following_count),
+                    (0, 0, 0, 0))
+
+    def test_profile_page_does_not_count_posts(self):
+        """Страница профиля берёт число постов из счётчиков."""
+        Post.objects.create(text='Пост', author=self.author)
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Всего постов: 1')
+
+    def test_reconcile_counters_command(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        Post.objects.bulk_create(
+            Post(text=f'Импорт {i}', author=self.author) for i in range(3))
+        self.assertEqual(self.counters(self.author).posts_count, 0)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.counters(self.author).posts_count, 3)
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -70,6 +71,7 @@ class PostFormTests(TestCase):
             'group': self.group.id,
             'image': uploaded,
         }
+        digest = hashlib.sha256(small_gif).hexdigest()
         response = self.authorized_client.post(
             reverse('posts:post_create'),
             data=form_data,
@@ -82,7 +84,7 @@ class PostFormTests(TestCase):
             Post.objects.filter(
                 text='Страх – это самое большое препятствие для обучения.',
                 group=self.group.id,
-                image='posts/small.gif'
+                image=f'posts/{digest[:2]}/{digest}.gif'
             ).exists()
         )
 
@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..hashtags import extract_tags, link_tags
+from ..models import Post, PostTag, Tag
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True)
+class HashtagTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def post_tags(self, post):
+        return set(PostTag.objects.filter(post=post).values_list(
+            'tag__name', flat=True))
+
+    def test_extract_tags(self):
+        """Теги нормализуются, якоря и повторы не считаются тегами."""
+        self.assertEqual(
+            extract_tags('#Гитара и #гитара, site.ru/#anchor ##x #рок_н_ролл'),
+            {'гитара', 'рок_н_ролл'},
+        )
+
+    def test_tags_saved_on_create(self):
+        """Теги нового поста сохраняются при создании через форму."""
+        self.author_client.post(reverse('posts:post_create'),
+                                data={'text': 'Новая #Гитара #рок'})
+        post = Post.objects.get()
+        self.assertEqual(self.post_tags(post), {'гитара', 'рок'})
+        self.assertEqual(
+            set(PostTag.objects.values_list('pub_date', flat=True)),
+            {post.pub_date},
+        )
+
+    def test_tags_updated_incrementally_on_edit(self):
+        """Правка поста меняет только добавленные и удалённые теги."""
+        post = Post.objects.create(text='#гитара #рок', author=self.author)
+        kept = PostTag.objects.get(post=post, tag__name='гитара')
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': '#Гитара #джаз'},
+        )
+        self.assertEqual(self.post_tags(post), {'гитара', 'джаз'})
+        self.assertTrue(PostTag.objects.filter(pk=kept.pk).exists())
+
+    def test_tag_feed_pages(self):
+        """Лента тега листается страницами и курсором."""
+        Post.objects.bulk_create(
+            Post(text=f'#гитара №{i}', author=self.author) for i in range(12))
+        Post.objects.create(text='Без тегов', author=self.author)
+        call_command('backfill_tags', stdout=StringIO())
+        url = reverse('posts:tag_feed', kwargs={'name': 'Гитара'})
+        first = self.author_client.get(url).context['page_obj']
+        self.assertEqual(first.paginator.count, 12)
+        cursor = self.author_client.get(url, {'after': 'x'}).context[
+            'page_obj']
+        second = self.author_client.get(
+            url, {'after': cursor.next_cursor}).context['page_obj']
+        self.assertEqual(len(cursor) + len(second), 12)
+
+    def test_unknown_tag_is_not_found(self):
+        """Лента несуществующего тега отдаёт 404."""
+        response = self.author_client.get(
+            reverse('posts:tag_feed', kwargs={'name': 'нет'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_backfill_command(self):
+        """Команда расставляет теги постам, созданным в обход сигналов."""
+        Post.objects.bulk_create([
+            Post(text='#рок', author=self.author),
+            Post(text='#рок #джаз', author=self.author),
+        ])
+        out = StringIO()
+        call_command('backfill_tags', batch_size=1, stdout=out)
+        call_command('backfill_tags', stdout=StringIO())
+        self.assertIn('Обработано постов: 2', out.getvalue())
+        self.assertEqual(PostTag.objects.count(), 3)
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_tags_rendered_as_links(self):
+        """Хэштеги в тексте выводятся ссылками, остальное экранируется."""
+        url = reverse('posts:tag_feed', kwargs={'name': 'рок'})
+        self.assertEqual(link_tags('<b> #Рок'),
+                         f'&lt;b&gt; <a href="{url}">#Рок</a>')
+
+    def test_api_tag_posts(self):
+        """API отдаёт посты тега от новых к старым."""
+        first = Post.objects.create(text='#рок раз', author=self.author)
+        second = Post.objects.create(text='#рок два', author=self.author)
+        response = Client().get('/api/v1/tags/Рок/posts/')
+        self.assertEqual([post['id'] for post in response.json()['results']],
+                         [second.pk, first.pk])
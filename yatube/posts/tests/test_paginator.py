@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..utils import (NUM_REC, CursorPage, CursorPaginator, decode_cursor,
+                     encode_cursor)
+
+User = get_user_model()
+POSTS_CNT: int = 25
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Курсор')
+        Post.objects.bulk_create(
+            Post(text=f'Пост №{i}', author=cls.author)
+            for i in range(POSTS_CNT)
+        )
+        cls.ordered = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_roundtrip(self):
+        """Токен курсора раскодируется в исходную пару (pub_date, id)."""
+        post = self.ordered[0]
+        self.assertEqual(decode_cursor(encode_cursor(post)),
+                         (post.pub_date, post.pk))
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Переход по курсорам ?after= проходит все посты без пропусков."""
+        url = reverse('posts:main')
+        response = self.guest_client.get(url, {'page': 1})
+        seen = list(response.context['page_obj'])
+        cursor = encode_cursor(seen[-1])
+        while cursor:
+            response = self.guest_client.get(url, {'after': cursor})
+            page_obj = response.context['page_obj']
+            self.assertIsInstance(page_obj, CursorPage)
+            self.assertLessEqual(len(page_obj), NUM_REC)
+            seen.extend(page_obj)
+            cursor = page_obj.next_cursor
+        self.assertEqual(seen, self.ordered)
+
+    def test_cursor_before_returns_previous_page(self):
+        """Курсор ?before= возвращает предыдущую страницу в прежнем порядке."""
+        url = reverse('posts:main')
+        cursor = encode_cursor(self.ordered[NUM_REC])
+        response = self.guest_client.get(url, {'before': cursor})
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), self.ordered[:NUM_REC])
+        self.assertFalse(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+
+    def test_cursor_page_runs_no_count(self):
+        """Курсорная страница не выполняет COUNT-запрос."""
+        cursor = encode_cursor(self.ordered[NUM_REC - 1])
+        with self.assertNumQueries(1):
+            paginator = CursorPaginator(self.author.posts.all(), NUM_REC)
+            list(paginator.get_page(after=cursor))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Битый курсор приводит к первой странице, а не к ошибке."""
+        response = self.guest_client.get(reverse('posts:main'),
+                                         {'after': 'не-курсор'})
+        self.assertEqual(list(response.context['page_obj']),
+                         self.ordered[:NUM_REC])
+
+    def test_numbered_page_links_to_cursors(self):
+        """Страницы с номером ссылаются на соседние страницы курсорами."""
+        url = reverse('posts:main')
+        response = self.guest_client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.next_cursor,
+                         encode_cursor(self.ordered[NUM_REC - 1]))
+        self.assertContains(response, f'?after={page_obj.next_cursor}')
+        self.assertNotContains(response, '?page=')
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertContains(
+            response, f'?before={encode_cursor(self.ordered[NUM_REC])}')
+        self.assertNotContains(response, '?page=')
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, UserCounters
+from ..timeline import get_follow_feed
+from ..utils import NUM_COMMENTS, NUM_REC, CursorPaginator
+
+User = get_user_model()
+
+
+class QueryPlanTest(TestCase):
+    """
+    Горячие запросы лент, комментариев и подписок обслуживаются индексами:
+    без полного просмотра таблиц и без сортировки во временном B-дереве.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=cls.group)
+        Comment.objects.create(text='Комментарий', author=cls.reader,
+                               post=cls.post)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndexes(self, queryset):
+        plan = self.get_plan(queryset)
+        for step in plan:
+            self.assertNotIn('TEMP B-TREE', step, plan)
+            if step.startswith('SCAN'):
+                self.assertIn('USING', step, plan)
+
+    def cursor_page(self, queryset):
+        paginator = CursorPaginator(queryset, NUM_REC)
+        return paginator.object_list.filter(paginator._beyond(
+            timezone.now(), self.post.pk, 'lt'))[:NUM_REC + 1]
+
+    def test_post_feeds_use_indexes(self):
+        """Главная, группа и профиль читаются по индексам (дата, id)."""
+        feeds = {
+            'index': Post.objects.for_feed(),
+            'group': Post.objects.for_feed().filter(group=self.group),
+            'profile': Post.objects.for_feed().filter(author=self.author),
+        }
+        for name, queryset in feeds.items():
+            with self.subTest(feed=name):
+                self.assertUsesIndexes(
+                    queryset.order_by('-pub_date', '-id')[:NUM_REC])
+                self.assertUsesIndexes(self.cursor_page(queryset))
+
+    def test_follow_feed_uses_timeline_index(self):
+        """Лента подписок читается по индексу материализованной ленты."""
+        feed = get_follow_feed(self.reader)
+        cursor_feed = feed.filter(CursorPaginator(feed, NUM_REC)._beyond(
+            timezone.now(), self.post.pk, 'lt'))
+        for source in feed.sources + cursor_feed.sources:
+            self.assertUsesIndexes(source[:NUM_REC])
+
+    def test_celebrity_feed_uses_author_index(self):
+        """
+        Посты каждого популярного автора читаются по индексу автора
+        не глубже страницы, сортируются только прочитанные строки.
+        """
+        star = User.objects.create(username='Звезда')
+        Post.objects.create(text='Пост звезды', author=star)
+        Follow.objects.create(user=self.reader, author=star)
+        UserCounters.objects.filter(user__in=(self.author, star)).update(
+            timeline_pulled=True)
+        cache.clear()
+        feed = get_follow_feed(self.reader)
+        self.assertEqual(len(feed.sources), 2)
+        pushed, pulled = feed.sources
+        self.assertUsesIndexes(pushed[:NUM_REC])
+        page = pulled[:NUM_REC]
+        plan = self.get_plan(page)
+        self.assertEqual(
+            sum('USING COVERING INDEX post_author_pub_date_idx' in step
+                for step in plan), 2, plan)
+        self.assertEqual(
+            [step for step in plan if 'TEMP B-TREE' in step],
+            ['USE TEMP B-TREE FOR ORDER BY'], plan)
+        self.assertEqual(plan[-1], 'USE TEMP B-TREE FOR ORDER BY')
+        for step in plan:
+            if step.startswith('SCAN'):
+                self.assertIn('USING', step, plan)
+        self.assertEqual(str(page.query).count(f'LIMIT {NUM_REC}'), 3)
+
+    def test_comments_page_uses_index(self):
+        """Страница комментариев читается по индексу (пост, дата, id)."""
+        comments = self.post.comments.select_related('author').order_by(
+            'created', 'id')
+        self.assertUsesIndexes(comments[:NUM_COMMENTS + 1])
+
+    def test_follow_lookups_use_indexes(self):
+        """Проверка подписки и выборка подписчиков идут по индексам."""
+        self.assertUsesIndexes(Follow.objects.filter(
+            user=self.reader, author=self.author))
+        self.assertUsesIndexes(Follow.objects.filter(
+            author=self.author).values('user_id'))
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, CommentSearch, Post, PostSearch
+from ..search import build_match_query, filter_search, search_posts
+
+User = get_user_model()
+PER_PAGE: int = 2
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True)
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Писатель')
+        cls.post = Post.objects.create(
+            text='Гитара Les Paul звучит тепло', author=cls.author)
+        cls.other = Post.objects.create(
+            text='Барабаны и бас', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def found_ids(self, query):
+        return [post.pk for post in search_posts(query, 10)]
+
+    def test_match_query_quotes_terms(self):
+        """Слова запроса экранируются и ищутся как префиксы."""
+        self.assertEqual(build_match_query('Гитара "OR" les-'),
+                         '"гитара"* "or"* "les"*')
+        self.assertEqual(build_match_query(' ?! '), '')
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при создании, правке и удалении поста."""
+        post = Post.objects.create(text='Укулеле', author=self.author)
+        self.assertEqual(self.found_ids('укулел'), [post.pk])
+        post.text = 'Мандолина'
+        post.save()
+        self.assertEqual(self.found_ids('укулеле'), [])
+        self.assertEqual(self.found_ids('мандолина'), [post.pk])
+        post.delete()
+        self.assertEqual(self.found_ids('мандолина'), [])
+
+    def test_index_follows_comments(self):
+        """Пост находится по тексту своих комментариев."""
+        comment = Comment.objects.create(
+            text='Отличный усилитель', author=self.author, post=self.other)
+        self.assertEqual(self.found_ids('усилитель'), [self.other.pk])
+        comment.delete()
+        self.assertEqual(self.found_ids('усилитель'), [])
+
+    def test_comment_changes_touch_only_their_row(self):
+        """Правка комментария меняет только его строку индекса."""
+        comment = Comment.objects.create(
+            text='Ламповый комбик', author=self.author, post=self.other)
+        self.assertEqual(CommentSearch.objects.get(pk=comment.pk).text,
+                         comment.text)
+        comment.text = 'Транзисторный комбик'
+        comment.post = self.post
+        comment.save()
+        self.assertEqual(self.found_ids('ламповый'), [])
+        self.assertEqual(self.found_ids('транзисторный'), [self.post.pk])
+        self.assertEqual(PostSearch.objects.get(pk=self.post.pk).text,
+                         self.post.text)
+
+    def test_post_text_ranks_above_comments(self):
+        """Совпадение в тексте поста весит больше, чем в комментарии."""
+        Comment.objects.create(text='Барабаны лучше', author=self.author,
+                               post=self.post)
+        self.assertEqual(self.found_ids('барабаны'),
+                         [self.other.pk, self.post.pk])
+
+    def test_search_pages_by_cursor(self):
+        """Результаты листаются курсором без пропусков и повторов."""
+        Post.objects.bulk_create(
+            Post(text=f'Гитара №{i}', author=self.author) for i in range(3))
+        first = search_posts('гитара', PER_PAGE)
+        second = search_posts('гитара', PER_PAGE, after=first.next_cursor)
+        self.assertTrue(first.has_next())
+        self.assertFalse(second.has_next())
+        found = [post.pk for post in list(first) + list(second)]
+        self.assertEqual(len(found), 4)
+        self.assertEqual(len(set(found)), 4)
+
+    def test_search_view_highlights_escaped_snippet(self):
+        """Страница поиска выводит экранированный фрагмент с подсветкой."""
+        Post.objects.create(text='<b>Гитара</b>', author=self.author)
+        response = Client().get(reverse('posts:search'), {'q': 'гитара'})
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertContains(response, '&lt;b&gt;<mark>Гитара</mark>')
+        self.assertNotContains(response, '<b>Гитара')
+
+    def test_filter_search_annotates_rank(self):
+        """Фильтр для API и админки оставляет только найденные посты."""
+        posts = filter_search(Post.objects.all(), 'les paul')
+        self.assertEqual([post.pk for post in posts], [self.post.pk])
+        self.assertLess(posts[0].search_rank, 0)
+
+    def test_api_search_orders_by_rank(self):
+        """API /posts/?search= возвращает посты по релевантности."""
+        Post.objects.create(text='Гитара, гитара и ещё раз гитара',
+                            author=self.author)
+        response = Client().get('/api/v1/posts/', {'search': 'гитара'})
+        texts = [post['text'] for post in response.json()['results']]
+        self.assertEqual(texts, ['Гитара, гитара и ещё раз гитара',
+                                 self.post.text])
@@ -0,0 +1,248 @@
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from PIL import Image
+
+from .. import thumbnails
+from ..blobs import reconcile_blobs
+from ..models import ImageBlob, Post
+from ..thumbnails import generate_post_thumbnail
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.png', size=(40, 20), color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Фотограф')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_placeholder_until_thumbnail_ready(self):
+        """Пока миниатюры нет, вместо картинки выводится заглушка."""
+        post = Post.objects.create(text='Закат', author=self.author,
+                                   image=make_image())
+        response = Client().get(post.get_absolute_url())
+        self.assertNotContains(response, '<img class="card-img')
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        with Image.open(post.thumbnail.path) as thumbnail:
+            self.assertEqual(thumbnail.size, (960, 339))
+        response = Client().get(post.get_absolute_url())
+        self.assertContains(response, f'src="{post.thumbnail.url}"')
+
+    def test_new_image_resets_thumbnail(self):
+        """Замена картинки сбрасывает готовую миниатюру."""
+        post = Post.objects.create(text='Закат', author=self.author,
+                                   image=make_image())
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        post.image = make_image('other.png', color='blue')
+        post.save()
+        self.assertEqual(post.thumbnail.name, '')
+        post.text = 'Рассвет'
+        post.save()
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        self.assertNotEqual(post.thumbnail.name, '')
+
+    @override_settings(POST_IMAGE_VARIANT_WIDTHS=(960, 480, 1920),
+                       POST_IMAGE_VARIANT_FORMATS=('PNG', 'JPEG'))
+    def test_image_variants_in_srcset(self):
+        """Варианты не шире исходной картинки попадают в srcset и API."""
+        post = Post.objects.create(text='Закат', author=self.author,
+                                   image=make_image(size=(1000, 500)))
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        variants = post.get_image_variants()
+        self.assertEqual([(variant['format'], variant['width'])
+                          for variant in variants],
+                         [('PNG', 480), ('PNG', 960),
+                          ('JPEG', 480), ('JPEG', 960)])
+        response = Client().get(post.get_absolute_url())
+        self.assertContains(response, '<source type="image/png" srcset="')
+        self.assertContains(response, ' 960w"')
+        response = Client().get(f'/api/v1/posts/{post.pk}/')
+        self.assertEqual(
+            [(variant['format'], variant['width'])
+             for variant in response.json()['image_variants']],
+            [('PNG', 480), ('PNG', 960), ('JPEG', 480), ('JPEG', 960)],
+        )
+        self.assertTrue(response.json()['image_variants'][0]['url']
+                        .startswith('http://testserver/media/cache/'))
+
+    def test_image_info_stored_on_upload(self):
+        """Размеры и вес сохраняются при загрузке, превью — в фоне."""
+        image = make_image(size=(40, 20))
+        post = Post.objects.create(text='Закат', author=self.author,
+                                   image=image)
+        self.assertEqual((post.image_width, post.image_height),
+                         (40, 20))
+        self.assertEqual(post.image_size, image.size)
+        generate_post_thumbnail(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.image_color, '#ff0000')
+        self.assertTrue(post.image_placeholder.startswith(
+            'data:image/jpeg;base64,'))
+        post.image = None
+        post.save()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_feed_rendering_reads_no_files(self):
+        """Лента выводит картинки фиксированного размера без чтения файлов."""
+        post = Post.objects.create(text='Закат', author=self.author,
+                                   image=make_image())
+        generate_post_thumbnail(post.pk)
+        cache.clear()
+        with mock.patch.object(FileSystemStorage, 'open') as opened, \
+                mock.patch.object(FileSystemStorage, 'size') as sized, \
+                mock.patch.object(FileSystemStorage, 'exists') as exists:
+            response = Client().get(reverse('posts:main'))
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'url(data:image/jpeg;base64,')
+        opened.assert_not_called()
+        sized.assert_not_called()
+        exists.assert_not_called()
+
+    def test_same_upload_stored_once(self):
+        """Одинаковые картинки хранятся и обрабатываются один раз."""
+        first = Post.objects.create(text='Мем', author=self.author,
+                                    image=make_image('meme.png'))
+        generate_post_thumbnail(first.pk)
+        second = Post.objects.create(text='Мем', author=self.author,
+                                     image=make_image('MEME.PNG'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/\w\w/\w{64}\.png$')
+        self.assertEqual(ImageBlob.objects.get().ref_count, 2)
+        with mock.patch('posts.thumbnails.build_image_fields') as build:
+            generate_post_thumbnail(second.pk)
+        build.assert_not_called()
+        second.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual(second.thumbnail, first.thumbnail)
+        self.assertEqual(second.image_placeholder, first.image_placeholder)
+
+    def test_reconcile_blobs(self):
+        """Сверка пересчитывает ссылки постов, созданных в обход сигналов."""
+        post = Post.objects.create(text='Мем', author=self.author,
+                                   image=make_image())
+        Post.objects.bulk_create([Post(text='Копия', author=self.author,
+                                       image=post.image.name)])
+        self.assertEqual(reconcile_blobs(), 1)
+        self.assertEqual(ImageBlob.objects.get().ref_count, 2)
+        self.assertEqual(reconcile_blobs(), 0)
+
+    def test_command_generates_missing_thumbnails(self):
+        """Команда готовит миниатюры для постов без них."""
+        Post.objects.bulk_create(
+            Post(text='Кадр', author=self.author, image=make_image())
+            for _ in range(2))
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('Подготовлено миниатюр: 2', out.getvalue())
+        self.assertFalse(Post.objects.filter(thumbnail='').exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_THUMBNAIL_WORKERS=0)
+class PostThumbnailQueueTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_thumbnail_queued_after_upload(self):
+        """Миниатюра готовится после фиксации создания поста."""
+        author = User.objects.create(username='Фотограф')
+        client = Client()
+        client.force_login(author)
+        client.post(reverse('posts:post_create'),
+                    data={'text': 'Закат', 'image': make_image()})
+        post = Post.objects.get()
+        self.assertTrue(post.thumbnail.name.startswith('cache/'))
+
+    def test_blob_deleted_with_last_reference(self):
+        """Файл картинки удаляется вместе с последним ссылающимся постом."""
+        author = User.objects.create(username='Фотограф')
+        posts = [Post.objects.create(text='Мем', author=author,
+                                     image=make_image())
+                 for _ in range(2)]
+        storage = posts[0].image.storage
+        name = posts[0].image.name
+        posts[0].delete()
+        self.assertTrue(storage.exists(name))
+        posts[1].delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(ImageBlob.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostThumbnailWorkersTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_thumbnail_generated_in_worker(self):
+        """Поток пула пишет миниатюру, варианты и превью картинки."""
+        author = User.objects.create(username='Фотограф')
+        executor = ThreadPoolExecutor(thread_name_prefix='thumbnails')
+        threads = []
+
+        # Тестовая база в памяти открыта с общим кэшем: строки,
+        # зафиксированные TransactionTestCase, видны и потоку пула.
+        def generate(post_id):
+            threads.append(threading.current_thread().name)
+            return generate_post_thumbnail(post_id)
+
+        with mock.patch.object(thumbnails, '_workers_enabled',
+                               return_value=True), \
+                mock.patch.object(thumbnails, '_executor', executor), \
+                mock.patch.object(thumbnails, 'generate_post_thumbnail',
+                                  side_effect=generate):
+            post = Post.objects.create(text='Закат', author=author,
+                                       image=make_image(size=(1000, 500)))
+            executor.shutdown(wait=True)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('thumbnails'))
+        post.refresh_from_db()
+        storage = post.thumbnail.storage
+        self.assertTrue(storage.exists(post.thumbnail.name))
+        variants = post.get_image_variants()
+        self.assertTrue(variants)
+        for variant in variants:
+            with self.subTest(variant=variant['name']):
+                self.assertTrue(storage.exists(variant['name']))
+        self.assertEqual(post.image_color, '#ff0000')
@@ -0,0 +1,182 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Post, Timeline, UserCounters
+from ..timeline import get_celebrity_ids
+from ..utils import NUM_REC, encode_cursor
+
+User = get_user_model()
+TIMELINE_CAP: int = 5
+
+
+@override_settings(TIMELINE_MAX_ENTRIES=TIMELINE_CAP)
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Писатель')
+        cls.reader = User.objects.create(username='Читатель')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self):
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+
+    def test_new_post_is_delivered_to_followers(self):
+        """Новый пост попадает в ленту подписчика в момент публикации."""
+        self.follow()
+        post = Post.objects.create(text='Свежий пост', author=self.author)
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=post).exists())
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту, отписка очищает её от постов автора."""
+        Post.objects.create(text='Старый пост', author=self.author)
+        self.follow()
+        self.assertEqual(self.reader.timeline.count(), 1)
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertEqual(self.reader.timeline.count(), 0)
+
+    def test_timeline_is_capped(self):
+        """
+        Публикация не обрезает ленты, фоновая команда оставляет в них
+        не больше TIMELINE_MAX_ENTRIES записей.
+        """
+        self.follow()
+        posts = [Post.objects.create(text=f'Пост {i}', author=self.author)
+                 for i in range(TIMELINE_CAP + 3)]
+        self.assertEqual(self.reader.timeline.count(), TIMELINE_CAP + 3)
+        call_command('update_timelines', stdout=StringIO())
+        kept = list(self.reader.timeline.values_list('post_id', flat=True))
+        self.assertEqual(kept, [post.pk for post in posts[::-1]][
+            :TIMELINE_CAP])
+
+    def test_fan_out_does_not_read_timelines(self):
+        """Раскладка нового поста не читает ленты подписчиков."""
+        self.follow()
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(text='Свежий пост', author=self.author)
+        self.assertFalse([query['sql'] for query in queries
+                          if query['sql'].startswith('SELECT')
+                          and 'FROM "posts_timeline"' in query['sql']])
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает потерянные записи."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.bulk_create(
+            Post(text=f'Импорт {i}', author=self.author) for i in range(3))
+        self.assertEqual(self.reader.timeline.count(), 0)
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.reader.timeline.count(), 3)
+
+
+@override_settings(TIMELINE_CELEBRITY_THRESHOLD=2,
+                   TIMELINE_CELEBRITY_DEMOTE_THRESHOLD=2)
+class HybridFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.celebrity = User.objects.create(username='Звезда')
+        cls.author = User.objects.create(username='Писатель')
+        cls.reader = User.objects.create(username='Читатель')
+        cls.fan = User.objects.create(username='Поклонник')
+        Follow.objects.create(user=cls.reader, author=cls.celebrity)
+        Follow.objects.create(user=cls.fan, author=cls.celebrity)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_celebrity_posts_are_not_fanned_out(self):
+        """Посты популярного автора не раскладываются по лентам."""
+        Post.objects.create(text='Пост звезды', author=self.celebrity)
+        self.assertFalse(Timeline.objects.filter(
+            post__author=self.celebrity).exists())
+
+    def test_feed_merges_pushed_and_pulled_posts(self):
+        """Лента подписок сливает доставленные и подмешанные посты."""
+        posts = [
+            Post.objects.create(text=f'Пост {i}',
+                                author=(self.celebrity, self.author)[i % 2])
+            for i in range(6)
+        ]
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, len(posts))
+        self.assertEqual(list(page_obj), posts[::-1])
+
+    def test_demoted_celebrity_posts_stay_in_feed(self):
+        """
+        Автор, опустившийся ниже порога, подмешивается при чтении, пока
+        фоновая команда не разложит его посты по лентам.
+        """
+        old = Post.objects.create(text='Пост звезды', author=self.celebrity)
+        Follow.objects.filter(user=self.fan, author=self.celebrity).delete()
+        self.assertFalse(Timeline.objects.filter(post=old).exists())
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [old])
+        out = StringIO()
+        call_command('update_timelines', stdout=out)
+        self.assertIn('Возвращено в ленты авторов: 1', out.getvalue())
+        self.assertNotIn(self.celebrity.pk, get_celebrity_ids())
+        self.assertTrue(Timeline.objects.filter(
+            user=self.reader, post=old).exists())
+        new = Post.objects.create(text='Новый пост', author=self.celebrity)
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [new, old])
+
+    @override_settings(TIMELINE_CELEBRITY_DEMOTE_THRESHOLD=1)
+    def test_celebrity_status_has_gap(self):
+        """Автор популярен, пока не опустится ниже порога возврата."""
+        Follow.objects.filter(user=self.fan, author=self.celebrity).delete()
+        call_command('update_timelines', stdout=StringIO())
+        self.assertTrue(UserCounters.objects.get(
+            user=self.celebrity).timeline_pulled)
+        Follow.objects.filter(user=self.reader,
+                              author=self.celebrity).delete()
+        call_command('update_timelines', stdout=StringIO())
+        self.assertFalse(UserCounters.objects.get(
+            user=self.celebrity).timeline_pulled)
+
+    def test_cursor_page_reads_one_page_per_source(self):
+        """
+        Курсорная страница ленты не считает посты, а популярных авторов
+        читает одной выборкой не глубже страницы.
+        """
+        stars = [self.celebrity]
+        for i in range(3):
+            star = User.objects.create(username=f'Звезда {i}')
+            Follow.objects.create(user=self.reader, author=star)
+            Follow.objects.create(user=self.fan, author=star)
+            stars.append(star)
+        posts = [Post.objects.create(text=f'Пост {i}',
+                                     author=(*stars, self.author)[i % 5])
+                 for i in range(3 * NUM_REC)]
+        cursor = encode_cursor(posts[-NUM_REC])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reader_client.get(reverse('posts:follow_index'),
+                                              {'after': cursor})
+        self.assertEqual(list(response.context['page_obj']),
+                         posts[-NUM_REC - 1::-1][:NUM_REC])
+        feed_queries = [query['sql'] for query in queries
+                        if 'FROM "posts_post"' in query['sql']]
+        self.assertEqual(len(feed_queries), 2)
+        for sql in feed_queries:
+            self.assertFalse(sql.startswith('SELECT COUNT('))
+            self.assertIn(f'LIMIT {NUM_REC + 1}', sql)
@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+EXIF_MAKE: int = 0x010F
+
+
+def make_jpeg(size=(300, 100), name='photo.jpg', padding=0):
+    buffer = BytesIO()
+    exif = Image.Exif()
+    exif[EXIF_MAKE] = 'Камера'
+    Image.new('RGB', size, 'green').save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue() + b'\0' * padding,
+                              content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=120,
+                   POST_IMAGE_PROCESSES=0)
+class PostUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Фотограф')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def create_post(self, image):
+        return self.client.post(reverse('posts:post_create'),
+                                data={'text': 'Кадр', 'image': image})
+
+    def test_upload_downsized_without_exif(self):
+        """Картинка уменьшается и переупаковывается без EXIF."""
+        self.create_post(make_jpeg())
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (120, 40))
+            self.assertNotIn(EXIF_MAKE, image.getexif())
+        self.assertEqual((post.image_width, post.image_height), (120, 40))
+
+    @override_settings(UPLOAD_MAX_BYTES=1024)
+    def test_oversized_upload_rejected(self):
+        """Файл больше предела не принимается."""
+        response = self.create_post(make_jpeg(padding=2048))
+        self.assertFormError(response, 'form', 'image',
+                             'Файл больше 1,0\xa0КБ.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected(self):
+        """Картинка с числом пикселей больше предела не принимается."""
+        response = self.create_post(make_jpeg())
+        self.assertFormError(response, 'form', 'image',
+                             'Картинка больше 0.001 Мп.')
+
+    def test_api_upload_recompressed(self):
+        """API переупаковывает картинку так же, как форма."""
+        token = AccessToken.for_user(self.author)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.post('/api/v1/posts/',
+                               {'text': 'Кадр', 'image': make_jpeg()})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['image_width'], 120)
+
+    @override_settings(POST_IMAGE_PROCESSES=1)
+    def test_recompressed_in_process_pool(self):
+        """Переупаковка выполняется в пуле процессов."""
+        self.create_post(make_jpeg(name='pool.jpg'))
+        self.assertEqual(Post.objects.get().image_width, 120)
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..counters import reconcile_counters
+from ..models import Follow, UserCounters
+from ..usernames import autocomplete_users, get_prefix_range
+
+User = get_user_model()
+
+
+class UsernamePrefixSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='Читатель')
+        cls.popular = User.objects.create(username='Анна')
+        cls.quiet = User.objects.create(username='анастасия')
+        cls.other = User.objects.create(username='Борис')
+        for author in (cls.popular, cls.quiet, cls.other):
+            Follow.objects.create(user=cls.reader, author=author)
+        Follow.objects.create(user=cls.other, author=cls.popular)
+
+    def setUp(self):
+        cache.clear()
+        token = AccessToken.for_user(self.reader)
+        self.api_client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_prefix_range(self):
+        """Диапазон ключей охватывает все имена с префиксом, даже U+10FFFF."""
+        self.assertEqual(get_prefix_range('АН'), ('ан', 'ао'))
+        last = chr(0x10FFFF)
+        self.assertEqual(get_prefix_range(f'а{last}{last}'),
+                         (f'а{last}{last}', 'б'))
+        self.assertEqual(get_prefix_range(last), (last, None))
+        self.assertEqual(get_prefix_range('\ud7ff'), ('\ud7ff', '\ue000'))
+        highest = User.objects.create(username=last * 3)
+        for prefix in (last, last * 3):
+            with self.subTest(prefix=prefix):
+                self.assertEqual(list(autocomplete_users(prefix)), [highest])
+
+    def test_username_key_follows_username(self):
+        """Ключ поиска создаётся и обновляется вместе с именем."""
+        self.other.username = 'Богдан'
+        self.other.save()
+        self.assertEqual(
+            UserCounters.objects.get(user=self.other).username_key, 'богдан')
+        UserCounters.objects.filter(user=self.other).update(username_key='')
+        self.assertEqual(reconcile_counters(), 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.other).username_key, 'богдан')
+
+    def test_autocomplete_ranks_by_followers(self):
+        """Подсказки идут от самых популярных пользователей."""
+        self.assertEqual(list(autocomplete_users('АН')),
+                         [self.popular, self.quiet])
+        self.assertEqual(list(autocomplete_users('')), [])
+
+    def test_short_prefix_is_cached(self):
+        """Подсказки для короткого префикса не сортируются заново."""
+        self.assertEqual(list(autocomplete_users('а')),
+                         [self.popular, self.quiet])
+        Follow.objects.create(user=self.popular, author=self.quiet)
+        Follow.objects.create(user=self.other, author=self.quiet)
+        with self.assertNumQueries(1):
+            users = list(autocomplete_users('А'))
+        self.assertEqual(users, [self.quiet, self.popular])
+
+    @override_settings(USER_AUTOCOMPLETE_SIZE=1)
+    def test_autocomplete_api(self):
+        """API подсказок отдаёт не больше USER_AUTOCOMPLETE_SIZE имён."""
+        response = self.api_client.get('/api/v1/users/autocomplete/',
+                                       {'q': 'ан'})
+        self.assertEqual(response.json(), [{
+            'username': 'Анна',
+            'first_name': '',
+            'last_name': '',
+            'followers_count': 2,
+        }])
+
+    def test_follow_search_by_prefix(self):
+        """Список подписок ищется по началу имени без учёта регистра."""
+        response = self.api_client.get('/api/v1/follow/', {'search': 'АНА'})
+        self.assertEqual(response.json(), [
+            {'user': 'Читатель', 'following': 'анастасия'},
+        ])
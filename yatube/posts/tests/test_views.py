@@ -2,6 +2,7 @@ import shutil
 import tempfile
 
 import django.db.models.fields.files
+from core.query_budget import QueryBudgetExceeded, query_budget
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -11,7 +12,8 @@ from django.core.paginator import Page
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Follow, Group, Post
+from ..models import Comment, Follow, Group, Post
+from ..utils import NUM_COMMENTS
 
 User = get_user_model()
 POSTS_ON_PAGE = 10
@@ -252,7 +254,7 @@ class PostPagesTest(TestCase):
         response = self.authorized_client.get(reverse('posts:main'))
         content_before = response.content
 
-        Post.objects.all().delete()
+        Post.objects.update(text='Правка в обход сигналов')
 
         response = self.authorized_client.get(reverse('posts:main'))
         content_after_del = response.content
@@ -303,3 +305,275 @@ class PostPagesTest(TestCase):
         response = self.authorized_client.get(reverse('posts:follow_index'))
         cnt_user = response.context.get('page_obj').paginator.count
         self.assertEqual(cnt_user, 0)
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True)
+class FeedQueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Проза',
+            slug='prose',
+            description='Проза'
+        )
+        cls.reader = User.objects.create(username='Читатель')
+        cls.authors = [User.objects.create(username=f'Автор{i}')
+                       for i in range(POSTS_ON_PAGE)]
+        for author in cls.authors:
+            post = Post.objects.create(text='Рассказ', author=author,
+                                       group=cls.group)
+            Comment.objects.create(text='Отзыв', post=post,
+                                   author=cls.reader)
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        cache.clear()
+
+    def test_feeds_fit_query_budget(self):
+        """Ленты укладываются в бюджет запросов независимо от авторов."""
+        feeds = (
+            reverse('posts:main'),
+            reverse('posts:group_list', kwargs={'slug': 'prose'}),
+            reverse('posts:profile', kwargs={'username': 'Автор0'}),
+            reverse('posts:follow_index'),
+        )
+        for url in feeds:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(len(response.context['page_obj']),
+                                 1 if 'profile' in url else POSTS_ON_PAGE)
+
+    def test_feed_posts_have_comment_counts(self):
+        """Посты ленты несут число комментариев без доп. запросов."""
+        response = self.reader_client.get(reverse('posts:main'))
+        for post in response.context['page_obj']:
+            with self.subTest(post=post):
+                self.assertEqual(post.comments_count, 1)
+
+    def test_query_budget_fails_when_exceeded(self):
+        """Превышение бюджета запросов приводит к ошибке."""
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(Post.objects.all())
+                list(Group.objects.all())
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True)
+class PostCommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Блогер')
+        cls.post = Post.objects.create(text='Обсуждаемый пост',
+                                       author=cls.author)
+        commentators = [User.objects.create(username=f'Комментатор{i}')
+                        for i in range(NUM_COMMENTS + 5)]
+        for num, commentator in enumerate(commentators):
+            Comment.objects.create(text=f'Мнение {num}', post=cls.post,
+                                   author=commentator)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_comments_page(self):
+        """Страница поста выводит только первую страницу комментариев."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), NUM_COMMENTS)
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, comments.next_cursor)
+
+    def test_comments_fragment_loads_rest(self):
+        """Фрагмент ?after= подгружает оставшиеся комментарии по порядку."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        first_page = list(response.context['comments'])
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+            {'after': response.context['comments'].next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        rest = list(response.context['comments'])
+        self.assertEqual(first_page + rest,
+                         list(self.post.comments.order_by('created', 'id')))
+        self.assertFalse(response.context['comments'].has_next())
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Кэшер')
+        cls.group = Group.objects.create(
+            title='Заметки',
+            slug='notes',
+            description='Заметки'
+        )
+        cls.post = Post.objects.create(text='Первая версия',
+                                       author=cls.author, group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def get_index(self):
+        return self.guest_client.get(reverse('posts:main')).content.decode()
+
+    def test_card_is_served_from_cache(self):
+        """Карточка поста берётся из кэша, пока пост не изменён."""
+        self.get_index()
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        self.assertIn('Первая версия', self.get_index())
+
+    def test_card_is_rebuilt_after_save(self):
+        """Сохранение поста сбрасывает кэш его карточки."""
+        self.get_index()
+        self.post.text = 'Вторая версия'
+        self.post.save()
+        self.assertIn('Вторая версия', self.get_index())
+
+    def test_card_is_rebuilt_after_author_change(self):
+        """Изменение автора сбрасывает кэш карточек его постов."""
+        self.get_index()
+        self.author.first_name = 'Фёдор'
+        self.author.save()
+        self.assertIn('Фёдор', self.get_index())
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Гость')
+        cls.group = Group.objects.create(
+            title='Новости',
+            slug='news',
+            description='Новости'
+        )
+        cls.post = Post.objects.create(text='Старая новость',
+                                       author=cls.author, group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.pages = (
+            reverse('posts:main'),
+            reverse('posts:group_list', kwargs={'slug': 'news'}),
+            reverse('posts:profile', kwargs={'username': 'Гость'}),
+        )
+        cache.clear()
+
+    def test_anonymous_pages_are_cached(self):
+        """Повторный анонимный запрос отдаётся из кэша."""
+        for url in self.pages:
+            self.guest_client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        for url in self.pages:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Старая новость')
+                self.assertIsNone(response.context)
+
+    def test_new_post_purges_its_pages(self):
+        """Новый пост сбрасывает кэш страниц, где он выводится."""
+        for url in self.pages:
+            self.guest_client.get(url)
+        Post.objects.create(text='Свежая новость', author=self.author,
+                            group=self.group)
+        for url in self.pages:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Свежая новость')
+
+    def test_comment_purges_post_pages(self):
+        """Новый комментарий сбрасывает кэш страниц поста."""
+        url = reverse('posts:group_list', kwargs={'slug': 'news'})
+        self.guest_client.get(url)
+        Comment.objects.create(text='Интересно', post=self.post,
+                               author=self.author)
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_deletions_purge_post_pages(self):
+        """Удаление поста или комментария сбрасывает кэш страниц поста."""
+        comment = Comment.objects.create(text='Интересно', post=self.post,
+                                         author=self.author)
+        url = reverse('posts:group_list', kwargs={'slug': 'news'})
+        self.assertContains(self.guest_client.get(url), 'Комментариев: 1')
+        comment.delete()
+        self.assertNotContains(self.guest_client.get(url), 'Комментариев')
+        for url in self.pages:
+            self.guest_client.get(url)
+        Post.objects.filter(pk=self.post.pk).delete()
+        for url in self.pages:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotContains(response, 'Старая новость')
+
+    def test_user_change_purges_only_rendered_fields(self):
+        """Кэш страниц сбрасывается только при смене выводимых полей."""
+        url = self.pages[0]
+        self.guest_client.get(url)
+        self.author.email = 'guest@example.com'
+        self.author.save()
+        self.author.set_password('secret')
+        self.author.save(update_fields=['password'])
+        self.assertIsNone(self.guest_client.get(url).context)
+        self.author.first_name = 'Гостевой'
+        self.author.save()
+        self.assertContains(self.guest_client.get(url), 'Гостевой')
+
+    def test_authorized_pages_are_not_cached_whole(self):
+        """Авторизованные пользователи получают страницу без полного кэша."""
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.pages[1])
+        response = client.get(self.pages[1])
+        self.assertIsNotNone(response.context)
+
+
+@override_settings(GROUPS_NAV_SIZE=2)
+class GroupNavigationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Навигатор')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'nav-{i}',
+                                 description='Группа')
+            for i in range(3)
+        ]
+        for num, group in enumerate(cls.groups):
+            for _ in range(num):
+                Post.objects.create(text='Пост', author=cls.user,
+                                    group=group)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def get_nav(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        menu = response.content.decode().split('dropdown-menu')[1]
+        return menu.split('</ul>')[0]
+
+    def test_navigation_shows_top_groups_and_more_link(self):
+        """В шапке выводятся самые активные группы и ссылка на остальные."""
+        nav = self.get_nav()
+        self.assertIn('Группа 2', nav)
+        self.assertIn('Группа 1', nav)
+        self.assertNotIn('Группа 0', nav)
+        self.assertIn(reverse('posts:group_index'), nav)
+
+    def test_navigation_is_cached_until_group_changes(self):
+        """Список групп берётся из кэша до изменения группы."""
+        self.get_nav()
+        Group.objects.filter(pk=self.groups[2].pk).update(title='Тайком')
+        self.assertNotIn('Тайком', self.get_nav())
+        group = self.groups[1]
+        group.title = 'Переименована'
+        group.save()
+        self.assertIn('Переименована', self.get_nav())
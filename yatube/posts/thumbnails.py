@@ -0,0 +1,254 @@
+import base64
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.images import get_image_dimensions
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils.html import format_html, format_html_join
+from PIL import Image, features
+from sorl.thumbnail import get_thumbnail
+
+from .models import Post
+
+THUMBNAIL_WIDTH: int = 960
+THUMBNAIL_HEIGHT: int = 339
+THUMBNAIL_GEOMETRY: str = f'{THUMBNAIL_WIDTH}x{THUMBNAIL_HEIGHT}'
+THUMBNAIL_OPTIONS: dict = {'crop': 'center', 'upscale': True}
+THUMBNAIL_RATIO: float = THUMBNAIL_HEIGHT / THUMBNAIL_WIDTH
+READY_IMAGE_FIELDS: tuple = (
+    'thumbnail', 'image_variants', 'image_width', 'image_height',
+    'image_size', 'image_color', 'image_placeholder',
+)
+PLACEHOLDER_SIZE: int = 16
+PLACEHOLDER_QUALITY: int = 40
+IMAGE_SIZES: str = '(max-width: 960px) 100vw, 960px'
+IMAGE_TYPES: dict = {'JPEG': 'image/jpeg', 'PNG': 'image/png',
+                     'WEBP': 'image/webp'}
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def get_executor():
+    """Общий пул потоков, в котором готовятся миниатюры."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POST_THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def get_variant_formats():
+    """Форматы вариантов, которые умеет кодировать установленный Pillow."""
+    return [image_format
+            for image_format in settings.POST_IMAGE_VARIANT_FORMATS
+            if image_format != 'WEBP' or features.check('webp')]
+
+
+def get_variant_widths(source_width):
+    """
+    Ширины вариантов, не превышающие ширину исходной картинки;
+    самая узкая из настроенных готовится всегда.
+    """
+    widths = sorted(settings.POST_IMAGE_VARIANT_WIDTHS)
+    return widths[:1] + [width for width in widths[1:]
+                         if width <= source_width]
+
+
+def build_image_variants(image, source_width):
+    """Готовит варианты картинки всех ширин и форматов."""
+    variants = []
+    for image_format in get_variant_formats():
+        for width in get_variant_widths(source_width):
+            geometry = f'{width}x{round(width * THUMBNAIL_RATIO)}'
+            variant = get_thumbnail(image, geometry, format=image_format,
+                                    **THUMBNAIL_OPTIONS)
+            variants.append({'width': width, 'format': image_format,
+                             'name': variant.name})
+    return variants
+
+
+def read_image_info(image):
+    """Размеры и вес картинки; из файла читается только заголовок."""
+    width, height = get_image_dimensions(image)
+    return {'image_width': width, 'image_height': height,
+            'image_size': image.size}
+
+
+def build_placeholder(image):
+    """Основной цвет картинки и data:-адрес её крошечной копии."""
+    with image.open('rb'), Image.open(image) as source:
+        source.draft('RGB', (PLACEHOLDER_SIZE * 2, PLACEHOLDER_SIZE * 2))
+        preview = source.convert('RGB')
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    color = '#{:02x}{:02x}{:02x}'.format(
+        *preview.resize((1, 1)).getpixel((0, 0)))
+    buffer = BytesIO()
+    preview.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    data = base64.b64encode(buffer.getvalue()).decode()
+    return color, f'data:image/jpeg;base64,{data}'
+
+
+def find_ready_image(image_name):
+    """
+    Готовые миниатюра, варианты и превью того же файла картинки
+    у другого поста: одинаковые картинки обрабатываются один раз.
+    """
+    return (Post.objects.filter(image=image_name)
+            .exclude(thumbnail='').exclude(image_variants='')
+            .exclude(image_placeholder='')
+            .order_by('pk').values(*READY_IMAGE_FIELDS).first())
+
+
+def build_image_fields(image, image_width=None):
+    """Миниатюра, варианты, размеры и превью картинки для полей поста."""
+    fields = {}
+    if image_width is None:
+        fields = read_image_info(image)
+        image_width = fields['image_width']
+    thumbnail = get_thumbnail(image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+    color, placeholder = build_placeholder(image)
+    fields.update(
+        thumbnail=thumbnail.name,
+        image_variants=json.dumps(
+            build_image_variants(image, image_width or 0)),
+        image_color=color,
+        image_placeholder=placeholder,
+    )
+    return fields
+
+
+def generate_post_thumbnail(post_id):
+    """
+    Готовит миниатюру, варианты и превью картинки поста и сохраняет их
+    в полях поста; если тот же файл уже обработан для другого поста,
+    копирует готовое. Если картинку успели заменить или пост удалён,
+    ничего не делает.
+    """
+    post = Post.objects.filter(pk=post_id).exclude(image='').first()
+    if post is None:
+        return None
+    image_name = post.image.name
+    fields = (find_ready_image(image_name)
+              or build_image_fields(post.image, post.image_width))
+    with transaction.atomic():
+        post = (Post.objects.select_for_update()
+                .filter(pk=post_id, image=image_name).first())
+        if post is None:
+            return None
+        for field, value in fields.items():
+            setattr(post, field, value)
+        post.save(update_fields=[*fields, 'updated'])
+    return fields['thumbnail']
+
+
+def get_variant_urls(post):
+    """Варианты картинки поста с адресами файлов."""
+    storage = post.thumbnail.storage
+    return [dict(variant, url=storage.url(variant['name']))
+            for variant in post.get_image_variants()]
+
+
+def _placeholder_style(post):
+    if not post.image_color:
+        return ''
+    if not post.image_placeholder:
+        return f'background: {post.image_color}'
+    return (f'background: {post.image_color} '
+            f'url({post.image_placeholder}) center / cover')
+
+
+def render_picture(post, css_class='card-img my-2'):
+    """
+    Картинка поста без обращения к файлам: <picture> с srcset по готовым
+    вариантам, готовая миниатюра или заглушка, пока их нет. Размеры
+    заданы заранее, а до загрузки показывается превью картинки.
+    """
+    style = _placeholder_style(post)
+    variants = get_variant_urls(post)
+    if not variants and post.thumbnail:
+        return format_html(
+            '<img class="{}" src="{}" width="{}" height="{}" style="{}" '
+            'loading="lazy">',
+            css_class, post.thumbnail.url, THUMBNAIL_WIDTH,
+            THUMBNAIL_HEIGHT, style)
+    if not variants:
+        if not post.image:
+            return ''
+        return format_html(
+            '<div class="{} bg-light" style="aspect-ratio: {} / {}; {}">'
+            '</div>',
+            css_class, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, style)
+    sources = {}
+    for variant in variants:
+        sources.setdefault(variant['format'], []).append(
+            (variant['url'], variant['width']))
+    srcsets = {
+        image_format: format_html_join(', ', '{} {}w', urls)
+        for image_format, urls in sources.items()
+    }
+    extra_sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((IMAGE_TYPES[image_format], srcset, IMAGE_SIZES)
+         for image_format, srcset in srcsets.items()
+         if image_format != 'JPEG'),
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" '
+        'width="{}" height="{}" style="{}" loading="lazy"></picture>',
+        extra_sources, css_class, post.thumbnail.url,
+        srcsets.get('JPEG', ''), IMAGE_SIZES, THUMBNAIL_WIDTH,
+        THUMBNAIL_HEIGHT, style,
+    )
+
+
+def _generate_safely(post_id):
+    try:
+        generate_post_thumbnail(post_id)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюру поста %s',
+                         post_id)
+
+
+def _generate_in_worker(post_id):
+    try:
+        _generate_safely(post_id)
+    finally:
+        connections.close_all()
+
+
+def _workers_enabled():
+    # Базу SQLite в памяти (тесты) нельзя безопасно делить между потоками.
+    in_memory = (connection.vendor == 'sqlite'
+                 and connection.is_in_memory_db())
+    return bool(settings.POST_THUMBNAIL_WORKERS) and not in_memory
+
+
+def queue_post_thumbnail(post_id):
+    """
+    Ставит подготовку миниатюры в очередь после фиксации транзакции.
+    При POST_THUMBNAIL_WORKERS = 0 миниатюра готовится сразу.
+    """
+    def submit():
+        if _workers_enabled():
+            get_executor().submit(_generate_in_worker, post_id)
+        else:
+            _generate_safely(post_id)
+    transaction.on_commit(submit)
+
+
+def generate_missing_thumbnails():
+    """
+    Готовит недостающие миниатюры всех постов с картинками.
+    Возвращает число подготовленных миниатюр.
+    """
+    post_ids = list(Post.objects.exclude(image='').filter(
+        Q(thumbnail='') | Q(image_variants='') | Q(image_placeholder=''))
+        .values_list('id', flat=True))
+    return sum(1 for post_id in post_ids if generate_post_thumbnail(post_id))
@@ -0,0 +1,349 @@
+import heapq
+from copy import copy
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Follow, Post, Timeline, UserCounters
+
+CELEBRITIES_CACHE_KEY: str = 'timeline:celebrities'
+BACKFILL_BATCH_SIZE: int = 100
+
+
+def get_timeline_cap():
+    """Максимальное количество записей в ленте одного пользователя."""
+    return settings.TIMELINE_MAX_ENTRIES
+
+
+def get_celebrity_ids():
+    """
+    Множество популярных авторов (UserCounters.timeline_pulled): их посты
+    не раскладываются по лентам, а подмешиваются при чтении.
+    """
+    celebrity_ids = cache.get(CELEBRITIES_CACHE_KEY)
+    if celebrity_ids is None:
+        celebrity_ids = frozenset(UserCounters.objects.filter(
+            timeline_pulled=True).values_list('user_id', flat=True))
+        cache.set(CELEBRITIES_CACHE_KEY, celebrity_ids,
+                  settings.TIMELINE_CELEBRITY_CACHE_TIMEOUT)
+    return celebrity_ids
+
+
+def promote_celebrity(author_id):
+    """
+    Делает автора популярным, когда число его подписчиков дошло
+    до TIMELINE_CELEBRITY_THRESHOLD: с этого момента его посты
+    подмешиваются при чтении. Ленты подписчиков при этом не меняются.
+    """
+    promoted = UserCounters.objects.filter(
+        user_id=author_id, timeline_pulled=False,
+        followers_count__gte=settings.TIMELINE_CELEBRITY_THRESHOLD,
+    ).update(timeline_pulled=True)
+    if promoted:
+        cache.delete(CELEBRITIES_CACHE_KEY)
+
+
+def get_demoted_ids():
+    """
+    Популярные авторы, у которых осталось меньше
+    TIMELINE_CELEBRITY_DEMOTE_THRESHOLD подписчиков.
+    """
+    return list(UserCounters.objects.filter(
+        timeline_pulled=True,
+        followers_count__lt=settings.TIMELINE_CELEBRITY_DEMOTE_THRESHOLD,
+    ).values_list('user_id', flat=True))
+
+
+def demote_celebrity(author_id):
+    """
+    Раскладывает последние посты автора по лентам подписчиков и снимает
+    с него признак популярного, если подписчиков всё ещё меньше порога
+    возврата. Пока ленты заполняются, посты автора по-прежнему
+    подмешиваются при чтении; опубликованные за это время посты
+    докладываются после снятия признака. Возвращает True, если автор
+    перестал быть популярным.
+    """
+    started = timezone.now()
+    backfill_followers(author_id)
+    demoted = UserCounters.objects.filter(
+        user_id=author_id, timeline_pulled=True,
+        followers_count__lt=settings.TIMELINE_CELEBRITY_DEMOTE_THRESHOLD,
+    ).update(timeline_pulled=False)
+    if not demoted:
+        return False
+    cache.delete(CELEBRITIES_CACHE_KEY)
+    backfill_followers(author_id, since=started)
+    return True
+
+
+def backfill_followers(author_id, since=None):
+    """
+    Добавляет последние посты автора (опубликованные не раньше since)
+    в ленты всех его подписчиков пачками по BACKFILL_BATCH_SIZE лент,
+    каждая в своей транзакции.
+    """
+    posts = Post.objects.filter(author_id=author_id)
+    if since is not None:
+        posts = posts.filter(pub_date__gte=since)
+    posts = list(posts.order_by('-pub_date', '-id')
+                 .values_list('id', 'pub_date')[:get_timeline_cap()])
+    if not posts:
+        return
+    follower_ids = list(Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True))
+    for offset in range(0, len(follower_ids), BACKFILL_BATCH_SIZE):
+        batch = follower_ids[offset:offset + BACKFILL_BATCH_SIZE]
+        with transaction.atomic():
+            Timeline.objects.bulk_create(
+                (Timeline(user_id=user_id, post_id=post_id,
+                          pub_date=pub_date)
+                 for user_id in batch for post_id, pub_date in posts),
+                ignore_conflicts=True,
+            )
+            trim_timelines(batch)
+
+
+def trim_timelines(user_ids):
+    """
+    Удаляет из лент пользователей записи сверх допустимого лимита:
+    по индексу ленты ищется запись сразу за лимитом, и удаляются
+    только она и более старые, если она есть.
+    """
+    cap = get_timeline_cap()
+    for user_id in user_ids:
+        entries = Timeline.objects.filter(user_id=user_id)
+        cutoff = list(entries.order_by('-pub_date', '-post_id')
+                      .values_list('pub_date', 'post_id')[cap:cap + 1])
+        if not cutoff:
+            continue
+        pub_date, post_id = cutoff[0]
+        entries.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lte=post_id)
+        ).delete()
+
+
+def trim_all_timelines():
+    """
+    Обрезает ленты всех подписчиков до лимита. Новый пост раскладывается
+    по лентам без обрезки, поэтому ленты обрезаются здесь, в фоне.
+    """
+    user_ids = UserCounters.objects.filter(
+        following_count__gt=0).values_list('user_id', flat=True)
+    trim_timelines(list(user_ids))
+
+
+def fan_out_post(post):
+    """
+    Доставляет новый пост в ленты всех подписчиков автора. Ленты
+    не обрезаются: лишние старые записи не мешают чтению первых
+    страниц и удаляются фоновой командой update_timelines.
+    """
+    if post.author_id in get_celebrity_ids():
+        return
+    follower_ids = list(Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True))
+    if not follower_ids:
+        return
+    Timeline.objects.bulk_create(
+        (Timeline(user_id=user_id, post_id=post.pk,
+                  pub_date=post.pub_date)
+         for user_id in follower_ids),
+        ignore_conflicts=True,
+    )
+
+
+def backfill_timeline(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    if author_id in get_celebrity_ids():
+        return
+    posts = (Post.objects.filter(author_id=author_id)
+             .order_by('-pub_date', '-id')
+             .values_list('id', 'pub_date')[:get_timeline_cap()])
+    with transaction.atomic():
+        Timeline.objects.bulk_create(
+            (Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+             for post_id, pub_date in posts),
+            ignore_conflicts=True,
+        )
+        trim_timelines([user_id])
+
+
+def prune_timeline(user_id, author_id):
+    """Удаляет из ленты подписчика посты автора, от которого он отписался."""
+    Timeline.objects.filter(user_id=user_id,
+                            post__author_id=author_id).delete()
+
+
+def rebuild_timeline(user_id):
+    """Полностью пересобирает ленту пользователя по его подпискам."""
+    posts = (Post.objects.filter(author__following__user_id=user_id)
+             .exclude(author_id__in=get_celebrity_ids())
+             .order_by('-pub_date', '-id')
+             .values_list('id', 'pub_date')[:get_timeline_cap()])
+    with transaction.atomic():
+        Timeline.objects.filter(user_id=user_id).delete()
+        Timeline.objects.bulk_create(
+            Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        )
+
+
+def _alias_lookup(lookup, aliases):
+    prefix = '-' if lookup.startswith('-') else ''
+    field, sep, rest = lookup.lstrip('-').partition('__')
+    return prefix + aliases.get(field, field) + sep + rest
+
+
+def _alias_q(node, aliases):
+    if not isinstance(node, Q):
+        lookup, value = node
+        return _alias_lookup(lookup, aliases), value
+    aliased = copy(node)
+    aliased.children = [_alias_q(child, aliases) for child in node.children]
+    return aliased
+
+
+class MergedFeed:
+    """
+    Лента, собранная k-путевым слиянием нескольких выборок постов,
+    упорядоченных по (pub_date, id). Поддерживает ту часть интерфейса
+    QuerySet, которой пользуются пейджинаторы; срез [start:stop] читает
+    из каждой выборки не больше stop записей, а курсорные фильтры
+    пейджинатора сужают выборки до keyset-диапазона, так что курсорная
+    страница обходится без COUNT и без чтения глубже самой страницы.
+
+    Для выборки можно задать псевдонимы полей сортировки, например
+    {'pub_date': 'feed_pub_date'}: тогда сортировка и курсорные фильтры
+    идут по её собственным проиндексированным столбцам.
+    """
+    ordered = True
+
+    def __init__(self, sources, aliases=None, descending=True):
+        self.sources = list(sources)
+        self.aliases = list(aliases or ({} for _ in self.sources))
+        self.descending = descending
+
+    def _clone(self, sources, descending=None):
+        if descending is None:
+            descending = self.descending
+        return self.__class__(sources, self.aliases, descending)
+
+    def _map(self, method, *args, **kwargs):
+        return [getattr(source, method)(*args, **kwargs)
+                for source in self.sources]
+
+    def select_related(self, *fields):
+        return self._clone(self._map('select_related', *fields))
+
+    def filter(self, *args, **kwargs):
+        args = (Q(*args, **kwargs),)
+        return self._clone([
+            source.filter(*(_alias_q(arg, aliases) for arg in args))
+            for source, aliases in zip(self.sources, self.aliases)
+        ])
+
+    def order_by(self, *fields):
+        descending = not fields or fields[0].startswith('-')
+        return self._clone([
+            source.order_by(*(_alias_lookup(field, aliases)
+                              for field in fields))
+            for source, aliases in zip(self.sources, self.aliases)
+        ], descending)
+
+    def reverse(self):
+        return self._clone(self._map('reverse'), not self.descending)
+
+    def count(self):
+        """Число постов для пейджинатора с номерами страниц."""
+        return min(sum(source.count() for source in self.sources),
+                   get_timeline_cap())
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice):
+            return self[k:k + 1][0]
+        start = k.start or 0
+        stop = get_timeline_cap()
+        if k.stop is not None:
+            stop = min(stop, k.stop)
+        if start >= stop:
+            return []
+        merged = heapq.merge(
+            *(source[:stop] for source in self.sources),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=self.descending,
+        )
+        return list(islice(merged, start, stop))
+
+
+class LatestPerAuthor:
+    """
+    Посты нескольких авторов для MergedFeed. Срез [:stop] читает
+    у каждого автора не больше stop последних постов по индексу
+    (автор, дата, id) — частями UNION ALL одного запроса — и сортирует
+    только их, а не все посты всех авторов, как author_id__in.
+    """
+
+    def __init__(self, queryset, author_ids):
+        self.queryset = queryset
+        self.author_ids = list(author_ids)
+
+    def _clone(self, queryset):
+        return self.__class__(queryset, self.author_ids)
+
+    def select_related(self, *fields):
+        return self._clone(self.queryset.select_related(*fields))
+
+    def filter(self, *args, **kwargs):
+        return self._clone(self.queryset.filter(*args, **kwargs))
+
+    def order_by(self, *fields):
+        return self._clone(self.queryset.order_by(*fields))
+
+    def reverse(self):
+        return self._clone(self.queryset.reverse())
+
+    def count(self):
+        return self.queryset.filter(author_id__in=self.author_ids).count()
+
+    def get_queryset(self, stop):
+        """Посты, среди которых лежат первые stop постов выборки."""
+        parts = [
+            Post.objects.filter(pk__in=self.queryset.filter(
+                author_id=author_id).values('pk')[:stop])
+            .order_by().values('pk')
+            for author_id in self.author_ids
+        ]
+        latest = parts[0].union(*parts[1:], all=True)
+        return self.queryset.filter(pk__in=latest)
+
+    def __getitem__(self, k):
+        return self.get_queryset(k.stop)[k]
+
+
+def get_follow_feed(user):
+    """
+    Гибридная лента подписок: посты обычных авторов читаются из
+    материализованной ленты (сортировка по её индексу), посты всех
+    популярных авторов — одной выборкой по частям на автора, поэтому
+    страница стоит не больше двух запросов при любом числе подписок.
+    """
+    followed_ids = set(Follow.objects.filter(
+        user_id=user.id).values_list('author_id', flat=True))
+    celebrity_ids = sorted(followed_ids & get_celebrity_ids())
+    pushed = Post.objects.for_feed().filter(
+        timeline_entries__user_id=user.id).exclude(
+        author_id__in=celebrity_ids).annotate(
+        feed_pub_date=F('timeline_entries__pub_date'),
+        feed_post_id=F('timeline_entries__post_id'))
+    sources = [pushed]
+    aliases = [{'pub_date': 'feed_pub_date', 'id': 'feed_post_id'}]
+    if celebrity_ids:
+        sources.append(LatestPerAuthor(Post.objects.for_feed(),
+                                       celebrity_ids))
+        aliases.append({})
+    return MergedFeed(sources, aliases).order_by('-pub_date', '-id')
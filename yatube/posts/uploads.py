@@ -0,0 +1,168 @@
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import (TemporaryUploadedFile,
+                                            UploadedFile)
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+RECOMPRESSED_FORMATS: dict = {
+    'JPEG': ('.jpg', 'image/jpeg'),
+    'PNG': ('.png', 'image/png'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Файл, превысивший предел размера: содержимое не сохраняется."""
+    oversized = True
+
+    def __init__(self, name, content_type, size, charset):
+        super().__init__(BytesIO(), name, content_type, size, charset)
+
+
+class RecompressedUploadedFile(TemporaryUploadedFile):
+    """
+    Переупакованная картинка во временном файле. Её нет в request.FILES,
+    поэтому файл закрывается при сборке мусора; если хранилище уже
+    перенесло его, закрытие ничего не делает.
+    """
+
+    def __del__(self):
+        self.close()
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    Обработчик загрузки, который перестаёт принимать файл, как только тот
+    превысит UPLOAD_MAX_BYTES: остаток потока читается и отбрасывается,
+    а вместо файла форма получает OversizedUploadedFile.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_BYTES:
+            self.oversized = True
+        return None if self.oversized else raw_data
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return None
+        return OversizedUploadedFile(self.file_name, self.content_type,
+                                     self.received, self.charset)
+
+
+def get_executor():
+    """Общий пул процессов, в котором переупаковываются картинки."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.POST_IMAGE_PROCESSES)
+    return _executor
+
+
+def recompress_file(source_path, target_path, max_side, quality):
+    """
+    Переупаковывает картинку без метаданных, уменьшив её до max_side
+    по большей стороне. Возвращает формат или None, если картинку
+    (например, анимацию) нужно сохранить как есть.
+    """
+    with Image.open(source_path) as source:
+        image_format = source.format
+        if (image_format not in RECOMPRESSED_FORMATS
+                or getattr(source, 'is_animated', False)):
+            return None
+        source.draft(source.mode, (max_side, max_side))
+        icc_profile = source.info.get('icc_profile')
+        image = ImageOps.exif_transpose(source)
+    image.thumbnail((max_side, max_side))
+    options = {'quality': quality}
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options.update(optimize=True, progressive=True)
+    elif image_format == 'PNG':
+        options = {'optimize': True}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    image.save(target_path, image_format, **options)
+    return image_format
+
+
+def _run_recompress(*args):
+    if not settings.POST_IMAGE_PROCESSES:
+        return recompress_file(*args)
+    return get_executor().submit(recompress_file, *args).result()
+
+
+def recompress_upload(upload):
+    """
+    Переупаковывает загруженную картинку в пуле процессов и возвращает
+    новый файл; в процессе запроса картинка не декодируется.
+    """
+    source = None
+    if hasattr(upload, 'temporary_file_path'):
+        source_path = upload.temporary_file_path()
+    else:
+        source = tempfile.NamedTemporaryFile(
+            dir=settings.FILE_UPLOAD_TEMP_DIR)
+        for chunk in upload.chunks():
+            source.write(chunk)
+        source.flush()
+        source_path = source.name
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    target = RecompressedUploadedFile(stem, upload.content_type, 0, None)
+    try:
+        image_format = _run_recompress(
+            source_path, target.temporary_file_path(),
+            settings.POST_IMAGE_MAX_SIDE, settings.POST_IMAGE_QUALITY)
+    except Exception:
+        target.close()
+        logger.exception('Не удалось переупаковать картинку %s',
+                         upload.name)
+        raise forms.ValidationError('Не удалось обработать картинку.',
+                                    code='invalid_image')
+    finally:
+        if source is not None:
+            source.close()
+    if image_format is None:
+        target.close()
+        upload.seek(0)
+        return upload
+    extension, content_type = RECOMPRESSED_FORMATS[image_format]
+    target.name = stem + extension
+    target.content_type = content_type
+    target.size = os.path.getsize(target.temporary_file_path())
+    return target
+
+
+def get_too_large_message():
+    """Сообщение об ошибке для файла больше UPLOAD_MAX_BYTES."""
+    return f'Файл больше {filesizeformat(settings.UPLOAD_MAX_BYTES)}.'
+
+
+def process_post_image(upload):
+    """
+    Проверяет предел числа пикселей проверенной полем картинки
+    и переупаковывает её без EXIF с ограничением размеров.
+    """
+    width, height = upload.image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise forms.ValidationError(
+            'Картинка больше %(limit)s Мп.', code='too_many_pixels',
+            params={'limit': f'{settings.POST_IMAGE_MAX_PIXELS / 10 ** 6:g}'})
+    return recompress_upload(upload)
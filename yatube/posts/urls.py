@@ -6,11 +6,18 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='main'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('tag/<str:name>/', views.tag_feed, name='tag_feed'),
+    path('search/', views.search, name='search'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'
+         ),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'
@@ -0,0 +1,91 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+AUTOCOMPLETE_CACHE_KEY: str = 'usernames:autocomplete:{size}:{prefix}'
+SURROGATES: range = range(0xD800, 0xE000)
+
+
+def get_username_key(username):
+    """Ключ поиска по имени пользователя без учёта регистра."""
+    return username.casefold()
+
+
+def _next_char(char):
+    code = ord(char) + 1
+    if code in SURROGATES:
+        code = SURROGATES.stop
+    return chr(code) if code <= 0x10FFFF else None
+
+
+def get_prefix_range(prefix):
+    """
+    Границы [from, to) ключей, начинающихся с prefix: условие по ним
+    выполняется диапазоном индекса, в отличие от LIKE и icontains.
+    Если у prefix нет следующей строки (он из одних U+10FFFF),
+    верхней границы нет: to равно None.
+    """
+    start = get_username_key(prefix)
+    stop = start.rstrip(chr(0x10FFFF))
+    if not stop:
+        return start, None
+    return start, stop[:-1] + _next_char(stop[-1])
+
+
+def filter_username_prefix(queryset, prefix, key_field):
+    """Оставляет строки, у которых ключ key_field начинается с prefix."""
+    if not prefix:
+        return queryset
+    start, stop = get_prefix_range(prefix)
+    queryset = queryset.filter(**{f'{key_field}__gte': start})
+    if stop is not None:
+        queryset = queryset.filter(**{f'{key_field}__lt': stop})
+    return queryset
+
+
+def _rank_users(users):
+    return users.select_related('counters').order_by(
+        '-counters__followers_count', 'counters__username_key',
+    )
+
+
+def get_top_user_ids(prefix):
+    """
+    Id самых популярных пользователей с коротким префиксом имени.
+    Такой префикс подходит к большой части пользователей, и сортировка
+    всех совпадений по числу подписчиков выполняется не на каждый
+    запрос, а раз в USER_AUTOCOMPLETE_CACHE_TIMEOUT.
+    """
+    size = settings.USER_AUTOCOMPLETE_SIZE
+    key = get_username_key(prefix)
+    cache_key = AUTOCOMPLETE_CACHE_KEY.format(
+        size=size, prefix=hashlib.md5(key.encode()).hexdigest())
+    user_ids = cache.get(cache_key)
+    if user_ids is None:
+        users = filter_username_prefix(User.objects.all(), prefix,
+                                       'counters__username_key')
+        user_ids = list(_rank_users(users).values_list('id', flat=True)
+                        [:size])
+        cache.set(cache_key, user_ids,
+                  settings.USER_AUTOCOMPLETE_CACHE_TIMEOUT)
+    return user_ids
+
+
+def autocomplete_users(prefix):
+    """
+    Не более USER_AUTOCOMPLETE_SIZE пользователей, чьё имя начинается
+    с prefix, от самых популярных по числу подписчиков. Длинный префикс
+    выбирает немного строк диапазоном индекса ключа, для короткого
+    берётся заранее посчитанный список.
+    """
+    if not prefix:
+        return User.objects.none()
+    if len(prefix) <= settings.USER_AUTOCOMPLETE_CACHED_PREFIX_LEN:
+        users = User.objects.filter(id__in=get_top_user_ids(prefix))
+    else:
+        users = filter_username_prefix(User.objects.all(), prefix,
+                                       'counters__username_key')
+    return _rank_users(users)[:settings.USER_AUTOCOMPLETE_SIZE]
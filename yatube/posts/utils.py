@@ -1,10 +1,176 @@
+import base64
+import binascii
+
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 NUM_REC: int = 10
+NUM_COMMENTS: int = 20
+FEED_ORDERING: tuple = ('-pub_date', '-id')
+
+CURSOR_AFTER: str = 'after'
+CURSOR_BEFORE: str = 'before'
+
+
+class InvalidCursor(ValueError):
+    """Курсор пагинации не удалось разобрать."""
+
+
+def encode_cursor(obj, field='pub_date'):
+    """Кодирует позицию объекта (field, id) в непрозрачный токен."""
+    raw = f'{getattr(obj, field).isoformat()}|{obj.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Раскодирует токен в пару (дата, id)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise InvalidCursor(token)
+    if value is None:
+        raise InvalidCursor(token)
+    return value, pk
+
+
+class CursorPage:
+    """Страница курсорной пагинации, совместимая по интерфейсу с Page."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
 
+    def has_previous(self):
+        return self._has_previous
 
-def get_page_obj(request, post_list):
-    """Функция возвращает объект пейджинатора."""
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return encode_cursor(self.object_list[-1], self.paginator.field)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return encode_cursor(self.object_list[0], self.paginator.field)
+        return None
+
+
+class CursorPaginator:
+    """
+    Курсорный (keyset) пейджинатор по паре (дата, id), по умолчанию —
+    (pub_date, id) от новых к старым. Не выполняет COUNT, выборка любой
+    страницы — один индексный диапазон.
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        self.field = ordering[0].lstrip('-')
+        self.pk_field = ordering[1].lstrip('-')
+        self.descending = ordering[0].startswith('-')
+        self.object_list = object_list.order_by(*ordering)
+        self.per_page = int(per_page)
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после/до курсора либо первую страницу."""
+        try:
+            if before:
+                return self._page_before(*decode_cursor(before))
+            if after:
+                return self._page_after(*decode_cursor(after))
+        except InvalidCursor:
+            pass
+        return self._page_after(None, None)
+
+    def _beyond(self, value, pk, lookup):
+        return (Q(**{f'{self.field}__{lookup}': value})
+                | Q(**{self.field: value, f'{self.pk_field}__{lookup}': pk}))
+
+    def _page_after(self, value, pk):
+        queryset = self.object_list
+        if value is not None:
+            queryset = queryset.filter(self._beyond(
+                value, pk, 'lt' if self.descending else 'gt'))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], self, has_next,
+                          has_previous=value is not None)
+
+    def _page_before(self, value, pk):
+        queryset = self.object_list.filter(self._beyond(
+            value, pk, 'gt' if self.descending else 'lt')).reverse()
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return CursorPage(rows, self, has_next=True,
+                          has_previous=has_previous)
+
+
+def set_page_cursors(page, field='pub_date'):
+    """
+    Добавляет странице с номером курсоры соседних страниц, чтобы ссылки
+    с неё вели на курсорную пагинацию, а не на ?page=N.
+    """
+    page.next_cursor = None
+    page.previous_cursor = None
+    if page.has_next():
+        page.next_cursor = encode_cursor(page[-1], field)
+    if page.has_previous():
+        page.previous_cursor = encode_cursor(page[0], field)
+    return page
+
+
+def get_page_obj(request, post_list, ordering=FEED_ORDERING):
+    """
+    Функция возвращает объект пейджинатора.
+    При наличии в запросе курсора ?after=/?before= используется
+    курсорная пагинация без COUNT-запроса. Первая страница и устаревшие
+    ссылки ?page=N отдаются обычным Paginator, но ссылки с них тоже
+    ведут на курсоры.
+    """
+    after = request.GET.get(CURSOR_AFTER)
+    before = request.GET.get(CURSOR_BEFORE)
+    if after or before:
+        return CursorPaginator(post_list, NUM_REC, ordering).get_page(
+            after, before)
     paginator = Paginator(post_list, NUM_REC)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    return set_page_cursors(paginator.get_page(page_number),
+                            ordering[0].lstrip('-'))
+
+
+def get_comments_page(request, post):
+    """
+    Функция возвращает страницу комментариев поста в хронологическом
+    порядке с курсором ?after= для подгрузки следующих.
+    """
+    comments = post.comments.select_related('author')
+    paginator = CursorPaginator(comments, NUM_COMMENTS,
+                                ordering=('created', 'id'))
+    return paginator.get_page(after=request.GET.get(CURSOR_AFTER))
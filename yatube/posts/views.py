@@ -1,15 +1,24 @@
+from core.query_budget import query_budget
 from django.contrib.auth.decorators import login_required
-from django.db import IntegrityError
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 from django.shortcuts import get_object_or_404, redirect, render
 
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import get_page_obj
+from .hashtags import TAG_ORDERING, get_tag_feed, normalize_tag
+from .models import Follow, Group, Post, Tag, User
+from .page_cache import cache_anonymous_page
+from .search import SEARCH_PARAM, search_posts
+from .timeline import get_follow_feed
+from .utils import CURSOR_AFTER, NUM_REC, get_comments_page, get_page_obj
 
 
+@cache_anonymous_page
+@query_budget(5)
 def index(request):
     """Функция-обработчик для главной страницы."""
-    post_list = Post.objects.select_related('group')
+    post_list = Post.objects.for_feed()
     page_obj = get_page_obj(request, post_list)
     context = {
         'page_obj': page_obj,
@@ -18,10 +27,12 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@cache_anonymous_page
+@query_budget(6)
 def group_posts(request, slug):
     """Функция-обработчик для страницы группы."""
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
     page_obj = get_page_obj(request, post_list)
     context = {
         'group': group,
@@ -30,10 +41,12 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(6)
 def post_detail(request, post_id):
     """Функция-обработчик для страницы поста."""
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('group', 'author__counters'), id=post_id)
+    comments = get_comments_page(request, post)
     form = CommentForm()
     context = {
         'post': post,
@@ -43,12 +56,61 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(2)
+def post_comments(request, post_id):
+    """Функция-обработчик фрагмента со следующей страницей комментариев."""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(request, post),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+@query_budget(3)
+def group_index(request):
+    """Функция-обработчик для страницы со списком всех групп."""
+    group_list = Group.objects.annotate(
+        posts_count=Count('posts')).order_by('title')
+    page_obj = Paginator(group_list, NUM_REC).get_page(
+        request.GET.get('page'))
+    return render(request, 'posts/group_index.html', {'page_obj': page_obj})
+
+
+@query_budget(6)
+def tag_feed(request, name):
+    """Функция-обработчик для страницы постов с хэштегом."""
+    tag = get_object_or_404(Tag, name=normalize_tag(name))
+    page_obj = get_page_obj(request, get_tag_feed(tag), TAG_ORDERING)
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/tag_feed.html', context)
+
+
+@query_budget(4)
+def search(request):
+    """Функция-обработчик для страницы поиска по постам и комментариям."""
+    query = request.GET.get(SEARCH_PARAM, '').strip()
+    page_obj = search_posts(query, NUM_REC,
+                            after=request.GET.get(CURSOR_AFTER))
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@cache_anonymous_page
+@query_budget(7)
 def profile(request, username):
     """Функция-обработчик для страницы профиля пользователя."""
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User.objects.select_related('counters'),
+                               username=username)
     is_following = Follow.objects.values_list("author_id", flat=True).filter(
         user_id=request.user.id, author_id=author.id).exists()
-    post_list = author.posts.all()
+    post_list = author.posts.for_feed()
     page_obj = get_page_obj(request, post_list)
     context = {
         'page_obj': page_obj,
@@ -122,10 +184,10 @@ def add_comment(request, post_id):
 
 
 @login_required
+@query_budget(7)
 def follow_index(request):
     """Функция-обработчик для страницы подписок."""
-    post_list = Post.objects.select_related('group').filter(
-        author__following__user=request.user)
+    post_list = get_follow_feed(request.user)
     page_obj = get_page_obj(request, post_list)
     context = {
         'page_obj': page_obj,
@@ -141,7 +203,9 @@ def profile_follow(request, username):
     try:
         if author == request.user:
             raise IntegrityError
-        Follow.objects.create(user_id=request.user.id, author_id=author.id)
+        with transaction.atomic():
+            Follow.objects.create(user_id=request.user.id,
+                                  author_id=author.id)
     except IntegrityError:
         return redirect('posts:follow_error')
     return redirect('posts:follow_index')
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.ApiGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,6 +87,7 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ATOMIC_REQUESTS': True,
     }
 }
 
@@ -154,6 +156,71 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 #     }
 # }
 
+# Максимальное количество записей в материализованной ленте подписок
+# (лишние записи удаляет команда update_timelines)
+TIMELINE_MAX_ENTRIES = 1000
+# Порог подписчиков, начиная с которого посты автора не раскладываются
+# по лентам, а подмешиваются при чтении. Обратно автор возвращается,
+# только опустившись ниже TIMELINE_CELEBRITY_DEMOTE_THRESHOLD, и уже
+# в фоне (команда update_timelines): подписка и отписка у порога
+# не гоняют посты автора по лентам
+TIMELINE_CELEBRITY_THRESHOLD = 10000
+TIMELINE_CELEBRITY_DEMOTE_THRESHOLD = 9000
+TIMELINE_CELEBRITY_CACHE_TIMEOUT = 60 * 5
+
+# Время жизни кэша отрисованных карточек постов
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время жизни кэша страниц для анонимных посетителей
+PAGE_CACHE_TIMEOUT = 60 * 15
+
+# Размер и время жизни кэша списка групп в навигации
+GROUPS_NAV_SIZE = 10
+GROUPS_NAV_CACHE_TIMEOUT = 60 * 15
+
+# Число потоков, в которых готовятся миниатюры картинок постов
+# (0 — готовить сразу после сохранения поста)
+POST_THUMBNAIL_WORKERS = 2
+
+# Ширины и форматы вариантов картинок постов для srcset
+POST_IMAGE_VARIANT_WIDTHS = (480, 960, 1920)
+POST_IMAGE_VARIANT_FORMATS = ('WEBP', 'JPEG')
+
+# Предел размера загружаемого файла: больший файл не принимается целиком
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Пределы картинок постов: число пикселей, сторона после уменьшения,
+# качество переупаковки и число процессов для неё (0 — в процессе запроса)
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 2560
+POST_IMAGE_QUALITY = 85
+POST_IMAGE_PROCESSES = 2
+
+# Число подсказок при автодополнении имени пользователя; подсказки
+# для префиксов не длиннее USER_AUTOCOMPLETE_CACHED_PREFIX_LEN
+# считаются заранее и хранятся в кэше
+USER_AUTOCOMPLETE_SIZE = 10
+USER_AUTOCOMPLETE_CACHED_PREFIX_LEN = 2
+USER_AUTOCOMPLETE_CACHE_TIMEOUT = 60 * 5
+
+# Наибольшее число объектов в одном пакетном запросе к API
+API_BULK_MAX_SIZE = 500
+
+# Сколько последних объектов связи встраивается в объект через ?include=
+API_INCLUDE_SIZE = 10
+
+# Сжатие ответов API: адреса с этим началом, тела от этого размера (байт)
+API_GZIP_PATH = '/api/'
+API_GZIP_MIN_SIZE = 1024
+
+# Проверка бюджетов SQL-запросов функций-обработчиков (включается в тестах)
+QUERY_BUDGET_ENABLED = False
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -166,6 +233,11 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 SIMPLE_JWT = {